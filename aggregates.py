@@ -0,0 +1,88 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+# Maintenance and lookup for the subject_stats aggregate table.
+# Writers call these inside their own transaction; nothing here commits.
+
+def add_semesters(conn, semester_ids):
+    """Fold the marks of many newly inserted semesters into subject_stats in one statement"""
+    _fold(conn, "s.semester_id IN (SELECT value FROM json_each(?))", json.dumps([int(i) for i in semester_ids]))
+
+def add_marks(conn, mark_ids):
+    """Fold newly inserted marks into subject_stats, for semesters filled over several transactions"""
+    _fold(conn, "m.mark_id IN (SELECT value FROM json_each(?))", json.dumps([int(i) for i in mark_ids]))
+
+def _fold(conn, where, ids):
+    conn.execute(f"""
+    INSERT INTO subject_stats (subject_code, sem_number, n, total_sum, total_sq_sum, min_total, max_total)
+    SELECT m.subject_code, s.sem_number, COUNT(m.total), SUM(m.total), SUM(m.total * m.total),
+           MIN(m.total), MAX(m.total)
+    FROM semesters s
+    JOIN marks m ON s.semester_id = m.semester_id
+    WHERE {where} AND m.total IS NOT NULL
+    GROUP BY m.subject_code, s.sem_number
+    ON CONFLICT (subject_code, sem_number) DO UPDATE SET
+        n = n + excluded.n,
+        total_sum = total_sum + excluded.total_sum,
+        total_sq_sum = total_sq_sum + excluded.total_sq_sum,
+        min_total = MIN(min_total, excluded.min_total),
+        max_total = MAX(max_total, excluded.max_total)
+    """, (ids,))
+
+def remove_students(conn, usns):
+    """Subtract many students' marks from subject_stats; call before deleting them"""
+    usns = json.dumps(list(usns))
+    conn.execute("""
+    WITH removed AS (
+        SELECT m.subject_code, s.sem_number, COUNT(m.total) as n, SUM(m.total) as total_sum,
+               SUM(m.total * m.total) as total_sq_sum
+        FROM semesters s
+        JOIN marks m ON s.semester_id = m.semester_id
+        WHERE s.usn IN (SELECT value FROM json_each(?)) AND m.total IS NOT NULL
+        GROUP BY m.subject_code, s.sem_number
+    )
+    UPDATE subject_stats
+    SET n = subject_stats.n - removed.n,
+        total_sum = subject_stats.total_sum - removed.total_sum,
+        total_sq_sum = subject_stats.total_sq_sum - removed.total_sq_sum
+    FROM removed
+    WHERE subject_stats.subject_code = removed.subject_code
+      AND subject_stats.sem_number = removed.sem_number
+    """, (usns,))
+    
+    # Min/max are not reversible; rescan the remaining rows for affected keys
+    conn.execute("""
+    UPDATE subject_stats
+    SET (min_total, max_total) = (
+        SELECT MIN(m.total), MAX(m.total)
+        FROM marks m
+        JOIN semesters s ON s.semester_id = m.semester_id
+        WHERE m.subject_code = subject_stats.subject_code
+          AND s.sem_number = subject_stats.sem_number
+          AND s.usn NOT IN (SELECT value FROM json_each(?1))
+    )
+    WHERE (subject_code, sem_number) IN (
+        SELECT m.subject_code, s.sem_number
+        FROM semesters s
+        JOIN marks m ON s.semester_id = m.semester_id
+        WHERE s.usn IN (SELECT value FROM json_each(?1))
+    )
+    """, (usns,))
+    
+    conn.execute("DELETE FROM subject_stats WHERE n <= 0")
+
+def branch_averages(conn, sem_number):
+    """Return count, mean, stddev, min and max of totals for every subject in a semester"""
+    df = pd.read_sql_query("""
+    SELECT subject_code, n, total_sum, total_sq_sum, min_total, max_total
+    FROM subject_stats
+    WHERE sem_number = ?
+    ORDER BY subject_code
+    """, conn, params=(int(sem_number),))
+    
+    df['branch_avg'] = df['total_sum'] / df['n']
+    variance = (df['total_sq_sum'] / df['n'] - df['branch_avg'] ** 2).clip(lower=0)
+    df['branch_std'] = np.sqrt(variance)
+    return df[['subject_code', 'n', 'branch_avg', 'branch_std', 'min_total', 'max_total']]
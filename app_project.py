@@ -1,433 +1,340 @@
-import sqlite3
-import pandas as pd
-import matplotlib.pyplot as plt
 import streamlit as st
 
-def setup_database():
-    """Create database and tables with sample data"""
-    conn = sqlite3.connect("student_activity.db")
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS students (
-        usn TEXT PRIMARY KEY,
-        name TEXT NOT NULL,
-        branch TEXT NOT NULL,
-        sem INT NOT NULL
-    )
-    """)
-    
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS semesters (
-        semester_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        usn TEXT NOT NULL,
-        sem_number INTEGER NOT NULL,
-        sgpa FLOAT,
-        FOREIGN KEY (usn) REFERENCES students(usn)
-    )
-    """)
-    
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS subjects (
-        code TEXT PRIMARY KEY,
-        name TEXT NOT NULL,
-        sem INT NOT NULL,
-        branch TEXT,
-        credits INTEGER
-    )
-    """)
-    
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS marks (
-        mark_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        semester_id INTEGER NOT NULL,
-        subject_code TEXT NOT NULL,
-        cie INTEGER,
-        see INTEGER,
-        total INTEGER,
-        grade TEXT,
-        FOREIGN KEY (semester_id) REFERENCES semesters(semester_id),
-        FOREIGN KEY (subject_code) REFERENCES subjects(code)
-    )
-    """)
-    
-    subjects_data = [
-        ('23MA1BSMCS', 'Mathematical Foundation For CS Stream-1', 1, 'Information Science And Engineering', 4),
-        ('22PH1BSPCS', 'Applied Physics for Computer Science Cluster', 1, 'Information Science And Engineering', 4),
-        ('22CS1ESPOP', 'Principles of programming in C', 1, 'Information Science And Engineering', 3),
-        ('22EC1ESIEL', 'Introduction to Electronics Engineering', 1, 'Information Science And Engineering', 3),
-        ('22ME1AEIDT', 'Innovation and Design Thinking', 1, 'Information Science And Engineering', 1),
-        ('22MA1HSBAK', 'Balake Kannada', 1, 'Information Science And Engineering', 1),
-        ('22CS1ESPYP', 'Introduction to PYTHON Programming', 1, 'Information Science And Engineering', 3),
-        ('22MA1AECEN', 'Communicative English', 1, 'Information Science And Engineering', 1),
-        
-        ('23MA2BSMCS', 'Mathematical Foundation For CS Stream-2', 2, 'Information Science And Engineering', 4),
-        ('22CY2BSCCS', 'Applied Chemistry for Computer Science Engineering Stream', 2, 'Information Science And Engineering', 4),
-        ('22ME2ESCED', 'Computer Aided Engineering Drawing', 2, 'Information Science And Engineering', 3),
-        ('22ME2ESIME', 'Introduction to Mechanical Engineering', 2, 'Information Science And Engineering', 3),
-        ('22EE2ESRES', 'Renewable Energy Sources', 2, 'Information Science And Engineering', 3),
-        ('22MA2HSCIP', 'Constitution of India & Professional Ethics', 2, 'Information Science And Engineering', 1),
-        ('23BT2AESFH', 'Scientific Foundations for Health', 2, 'Information Science And Engineering', 1),
-        
-        ('23MA3BSSDM', 'Statistics and Discrete Mathematics', 3, 'Information Science And Engineering', 3),
-        ('23IS3PCCOA', 'Computer Organization and Architecture', 3, 'Information Science And Engineering', 3),
-        ('23IS3PCDSC', 'Data Structures', 3, 'Information Science And Engineering', 4),
-        ('23IS3PCOOP', 'Object oriented Programming Using C++', 3, 'Information Science And Engineering', 4),
-        ('23IS3PCDLD', 'Digital Logic Design', 3, 'Information Science And Engineering', 3),
-        ('23IS3PCOPS', 'Operating Systems', 3, 'Information Science And Engineering', 4),
-        ('23IS3AEUSP', 'UNIX System Programming', 3, 'Information Science And Engineering', 1)
-    ]
-    
-    for subject in subjects_data:
-        cursor.execute("INSERT OR IGNORE INTO subjects (code, name, sem, branch, credits) VALUES (?, ?, ?, ?, ?)", subject)
-    
-    conn.commit()
-    conn.close()
+import cache
+import charts
+import cohort
+import grading
+import importer
+import profiler
+import queries
+import ranks
+import snapshot
+import writer
+from database import bootstrap, get_pool
 
-def calculate_sgpa(semester_id):
-    """Calculate SGPA using credits and grade points formula"""
-    conn = sqlite3.connect("student_activity.db")
-    query = """
-    SELECT m.grade, s.credits 
-    FROM marks m 
-    JOIN subjects s ON m.subject_code = s.code 
-    WHERE m.semester_id = ?
-    """
-    df = pd.read_sql_query(query, conn, params=(semester_id,))
-    conn.close()
-    
-    grade_points = {'O': 10, 'A+': 9, 'A': 8, 'B+': 7, 'B': 6, 'F': 0}
-    
-    if df.empty:
-        return 0
-    
-    total_points = sum(grade_points.get(row['grade'], 0) * row['credits'] for _, row in df.iterrows())
-    total_credits = df['credits'].sum()
-    
-    return total_points / total_credits if total_credits > 0 else 0
+def get_connection():
+    """Return this session's pooled read-only connection, leased once per browser session"""
+    lease = st.session_state.get("db_lease")
+    if lease is None:
+        lease = st.session_state["db_lease"] = get_pool(readonly=True).lease()
+    elif lease.conn.in_transaction:
+        # An open read transaction would keep this session on an old snapshot
+        # of the database; end any that a previous rerun left behind
+        lease.conn.rollback()
+    return lease.conn
+
+# Above this many students comparison mode defaults to percentile bands
+COHORT_VIEW_THRESHOLD = 30
 
 st.title("🎓 Student Performance Visualization Tool")
 st.markdown("**Advanced Python Course Project - Student Academic Performance Dashboard**")
 
-setup_database()
-
-# Sidebar
-with st.sidebar:
-    st.header("💯 Mode Selection")
-    mode = st.radio("Choose Mode:", ["Personal Performance", "Student Comparison"])
-    
-    st.markdown("---")
-    st.header("📊 Database Stats")
-    conn = sqlite3.connect("student_activity.db")
-    students_count = pd.read_sql_query("SELECT COUNT(*) as count FROM students", conn).iloc[0]['count']
-    semesters_count = pd.read_sql_query("SELECT COUNT(*) as count FROM semesters", conn).iloc[0]['count']
-    marks_count = pd.read_sql_query("SELECT COUNT(*) as count FROM marks", conn).iloc[0]['count']
-    conn.close()
+bootstrap()
+conn = get_connection()
+# All writes are queued to this process's single writer thread
+db_writer = writer.get_writer()
+if snapshot.ENABLED:
+    # Re-export changed snapshot partitions as soon as a write commits
+    db_writer.add_listener(snapshot.get_snapshot().notify)
+prof = profiler.start(conn)
+# Set by the sidebar; logged even when the run stops early (e.g. st.rerun)
+mode = None
+try:
+    generation = cache.current_generation(conn)
     
-    st.metric("Students", students_count)
-    st.metric("Semesters", semesters_count)
-    st.metric("Marks Records", marks_count)
-
-# Mode 1: Personal Performance
-if mode == "Personal Performance":
-    st.header("📈 Personal Performance Tracking")
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        usn = st.text_input("Enter USN:", placeholder="e.g., 1BM23IS251").upper()
-    with col2:
-        name = st.text_input("Enter Name:", placeholder="Student Name")
-
-    if usn and name:
-        conn = sqlite3.connect("student_activity.db")
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT name, sem FROM students WHERE usn = ?", (usn,))
-        existing_student = cursor.fetchone()
+    # Sidebar
+    with st.sidebar:
+        st.header("💯 Mode Selection")
+        mode = st.radio("Choose Mode:", ["Personal Performance", "Student Comparison", "Bulk Import"])
         
-        if existing_student:
-            st.success(f"✅ Student {existing_student[0]} found!")
-        else:
-            current_sem = st.number_input("Current Semester:", min_value=1, max_value=8, value=4)
-            if st.button("Add Student"):
-                cursor.execute("INSERT INTO students (usn, name, branch, sem) VALUES (?, ?, ?, ?)", 
-                              (usn, name, "Information Science And Engineering", current_sem))
-                conn.commit()
-                st.success(f"✅ Student {name} added!")
-        
-        current_sem = st.number_input("Current Semester (for visualization):", min_value=2, max_value=8, value=4)
-        
-        st.subheader("📝 Enter Marks for Previous Semesters")
+        st.markdown("---")
+        st.header("📊 Database Stats")
+        with profiler.section("sidebar stats"):
+            counts = cache.cached(conn, generation, queries.database_stats)
+            students_count = counts['students']
+            semesters_count = counts['semesters']
+            marks_count = counts['marks']
+            
+            st.metric("Students", students_count)
+            st.metric("Semesters", semesters_count)
+            st.metric("Marks Records", marks_count)
+            
+            cache_stats = cache.query_cache.stats()
+            st.caption(f"Query cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
+            render_stats = charts.render_cache.stats()
+            st.caption(f"Chart cache: {render_stats['hits']} hits / {render_stats['misses']} misses")
+            writer_stats = db_writer.stats()
+            st.caption(f"Writer: {writer_stats['requests']} writes in {writer_stats['batches']} transactions")
+    
+    # Mode 1: Personal Performance
+    if mode == "Personal Performance":
+        st.header("📈 Personal Performance Tracking")
         
-        for sem in range(1, current_sem):
-            with st.expander(f"Semester {sem}"):
-                cursor.execute("SELECT semester_id FROM semesters WHERE usn = ? AND sem_number = ?", (usn, sem))
-                existing_sem = cursor.fetchone()
-                
-                if existing_sem:
-                    st.info(f"Data already exists for Semester {sem}")
-                    continue
-                
-                cursor.execute("SELECT code, name, credits FROM subjects WHERE sem = ?", (sem,))
-                subjects = cursor.fetchall()
-                
-                if subjects:
-                    marks_data = []
-                    
-                    for subject_code, subject_name, credits in subjects:
-                        st.write(f"**{subject_code}** - {subject_name} ({credits} credits)")
-                        
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            cie = st.number_input("CIE (out of 50)", 0, 50, key=f"cie_{sem}_{subject_code}")
-                        with col2:
-                            see_input = st.number_input("SEE (out of 100)", 0, 100, key=f"see_{sem}_{subject_code}")
+        col1, col2 = st.columns(2)
+        with col1:
+            usn = st.text_input("Enter USN:", placeholder="e.g., 1BM23IS251").upper()
+        with col2:
+            name = st.text_input("Enter Name:", placeholder="Student Name")
+    
+        if usn and name:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT name, sem FROM students WHERE usn = ?", (usn,))
+            existing_student = cursor.fetchone()
+            
+            if existing_student:
+                st.success(f"✅ Student {existing_student[0]} found!")
+            else:
+                current_sem = st.number_input("Current Semester:", min_value=1, max_value=8, value=4)
+                if st.button("Add Student"):
+                    db_writer.write(writer.add_student, usn, name, "Information Science And Engineering", current_sem)
+                    st.success(f"✅ Student {name} added!")
+            
+            current_sem = st.number_input("Current Semester (for visualization):", min_value=2, max_value=8, value=4)
+            
+            st.subheader("📝 Enter Marks for Previous Semesters")
+            
+            with profiler.section("semester entry"):
+                for sem in range(1, current_sem):
+                    with st.expander(f"Semester {sem}"):
+                        cursor.execute("SELECT semester_id FROM semesters WHERE usn = ? AND sem_number = ?", (usn, sem))
+                        existing_sem = cursor.fetchone()
                         
-                        see = see_input / 2
-                        total = cie + see
+                        if existing_sem:
+                            st.info(f"Data already exists for Semester {sem}")
+                            continue
                         
-                        if total >= 90:
-                            grade = 'O'
-                        elif total >= 80:
-                            grade = 'A+'
-                        elif total >= 70:
-                            grade = 'A'
-                        elif total >= 60:
-                            grade = 'B+'
-                        elif total >= 50:
-                            grade = 'B'
-                        else:
-                            grade = 'F'
+                        cursor.execute("SELECT code, name, credits FROM subjects WHERE sem = ?", (sem,))
+                        subjects = cursor.fetchall()
                         
-                        st.write(f"Total: {total:.1f} | Grade: {grade}")
-                        marks_data.append((subject_code, cie, see, total, grade))
+                        if subjects:
+                            marks_data = []
+                            
+                            for subject_code, subject_name, credits in subjects:
+                                st.write(f"**{subject_code}** - {subject_name} ({credits} credits)")
+                                
+                                col1, col2 = st.columns(2)
+                                with col1:
+                                    cie = st.number_input("CIE (out of 50)", 0, 50, key=f"cie_{sem}_{subject_code}")
+                                with col2:
+                                    see_input = st.number_input("SEE (out of 100)", 0, 100, key=f"see_{sem}_{subject_code}")
+                                
+                                see = see_input / 2
+                                total = cie + see
+                                
+                                grade = grading.grade_for(total)
+                                
+                                st.write(f"Total: {total:.1f} | Grade: {grade}")
+                                marks_data.append((subject_code, cie, see, total, grade))
+                            
+                            if st.button(f"Save Semester {sem}", key=f"save_{sem}"):
+                                sgpa = db_writer.write(writer.save_semester, usn, sem, marks_data)
+                                
+                                st.success(f"✅ Semester {sem} saved! SGPA: {sgpa:.2f}")
+                                st.rerun()
+            
+            st.subheader("📊 Performance Visualization")
+            
+            if st.button("Generate Graph"):
+                with profiler.section("generate graph"):
+                    df = cache.cached(conn, generation, queries.sgpa_series, usn)
                     
-                    if st.button(f"Save Semester {sem}", key=f"save_{sem}"):
-                        cursor.execute("INSERT INTO semesters (usn, sem_number, sgpa) VALUES (?, ?, ?)", 
-                                      (usn, sem, 0))
-                        semester_id = cursor.lastrowid
+                    if not df.empty:
+                        cgpa = float(grading.cgpa(df).iloc[0])
                         
-                        for subject_code, cie, see, total, grade in marks_data:
-                            cursor.execute("INSERT INTO marks (semester_id, subject_code, cie, see, total, grade) VALUES (?, ?, ?, ?, ?, ?)",
-                                          (semester_id, subject_code, cie, see, total, grade))
+                        col1, col2 = st.columns(2)
                         
-                        conn.commit()
+                        with col1:
+                            st.image(charts.render(charts.draw_sgpa_trend, df, name, usn, cgpa), use_container_width=True)
                         
-                        sgpa = calculate_sgpa(semester_id)
-                        cursor.execute("UPDATE semesters SET sgpa = ? WHERE semester_id = ?", (sgpa, semester_id))
-                        conn.commit()
+                        with col2:
+                            st.write("**Performance Summary**")
+                            st.metric("CGPA", f"{cgpa:.2f}")
+                            best_sem = df.loc[df['sgpa'].idxmax(), 'sem_number']
+                            st.metric("Best Semester", f"Sem {int(best_sem)}")
+                            st.metric("Semesters Completed", len(df))
+                            rank = cache.cached(conn, generation, ranks.student_rank, usn)
+                            if rank:
+                                st.metric("Branch Rank (CGPA)", f"{rank[0]} / {rank[1]}",
+                                          help=f"At or above {rank[2]:.0f}% of the branch")
                         
-                        st.success(f"✅ Semester {sem} saved! SGPA: {sgpa:.2f}")
-                        st.rerun()
-        
-        st.subheader("📊 Performance Visualization")
+                        # Semester-wise comparison
+                        st.subheader("📊 Semester-wise Subject Comparison")
+                        for sem_num in df['sem_number']:
+                            with st.expander(f"Semester {int(sem_num)}"):
+                                sem_comp_df = cache.cached(conn, generation, queries.semester_comparison, usn, int(sem_num))
+                                
+                                if not sem_comp_df.empty:
+                                    png = charts.render(charts.draw_subject_comparison, sem_comp_df, int(sem_num))
+                                    st.image(png, use_container_width=True)
+                                
+                                sem_ranks = cache.cached(conn, generation, ranks.subject_ranks, usn, int(sem_num))
+                                if not sem_ranks.empty:
+                                    sem_ranks = sem_ranks.assign(
+                                        rank=sem_ranks['rank'].astype(str) + ' / ' + sem_ranks['cohort_size'].astype(str),
+                                        percentile=sem_ranks['percentile'].round(1))
+                                    st.dataframe(sem_ranks[['subject_code', 'total', 'rank', 'percentile']].rename(columns={
+                                        'subject_code': 'Subject', 'total': 'Total', 'rank': 'Rank', 'percentile': 'Percentile'}),
+                                        hide_index=True, use_container_width=True)
+                        
+    
+                    else:
+                        st.warning("⚠️ No semester data found! Please enter marks first.")
+        else:
+            st.info("👆 Enter USN and Name to get started!")
+    
+    # Mode 2: Student Comparison
+    elif mode == "Student Comparison":
+        st.header("🔄 Student Comparison (Same Branch)")
         
-        if st.button("Generate Graph"):
-            query = "SELECT sem_number, sgpa FROM semesters WHERE usn = ? ORDER BY sem_number"
-            df = pd.read_sql_query(query, conn, params=(usn,))
+        with profiler.section("student management"):
+            # Get all students for remove dropdown
+            all_students_temp = cache.read_sql(conn, generation, "SELECT DISTINCT usn, name FROM students ORDER BY usn")
             
-            if not df.empty:
-                cgpa = df['sgpa'].mean()
+            # Remove student option
+            if len(all_students_temp) > 0:
+                st.subheader("🗑️ Remove Student")
+                student_to_remove = st.selectbox("Select student to remove:", all_students_temp['usn'].tolist())
                 
-                col1, col2 = st.columns(2)
+                if st.button("❌ Remove Student"):
+                    db_writer.write(cohort.remove_students, [student_to_remove], exclusive=True)
+                    st.success(f"✅ Student {student_to_remove} removed!")
+                    st.rerun()
                 
-                with col1:
-                    fig, ax = plt.subplots(figsize=(10, 6))
-                    ax.plot(df['sem_number'], df['sgpa'], marker='o', linewidth=3, markersize=10, color='#1f77b4')
-                    ax.axhline(y=cgpa, color='red', linestyle='--', linewidth=2, label=f'CGPA: {cgpa:.2f}')
-                    
-                    for i, row in df.iterrows():
-                        ax.annotate(f'{row["sgpa"]:.2f}', (row['sem_number'], row['sgpa']), 
-                                   textcoords="offset points", xytext=(0,10), ha='center', fontweight='bold')
+                with st.expander("🎓 Remove or Archive a Cohort"):
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        cohort_sem = st.number_input("Current semester:", min_value=1, max_value=8, value=8)
+                    with col2:
+                        branches = cache.read_sql(conn, generation, "SELECT DISTINCT branch FROM students ORDER BY branch")
+                        cohort_branch = st.selectbox("Branch:", branches['branch'].tolist())
+                    archive = st.checkbox("Move removed rows to history tables", value=True)
                     
-                    ax.set_xlabel('Semester', fontsize=12)
-                    ax.set_ylabel('SGPA', fontsize=12)
-                    ax.set_title(f'Academic Performance - {name} ({usn})', fontsize=14, fontweight='bold')
-                    ax.grid(True, alpha=0.3)
-                    ax.legend(fontsize=12)
-                    ax.set_ylim(0, 10)
-                    plt.tight_layout()
+                    cohort_usns = cohort.select_cohort(conn, cohort_sem, cohort_branch)
+                    st.write(f"{len(cohort_usns)} student(s) match.")
                     
-                    st.pyplot(fig)
-                    plt.close(fig)
-                
-                with col2:
-                    st.write("**Performance Summary**")
-                    st.metric("CGPA", f"{cgpa:.2f}")
-                    best_sem = df.loc[df['sgpa'].idxmax(), 'sem_number']
-                    st.metric("Best Semester", f"Sem {int(best_sem)}")
-                    st.metric("Semesters Completed", len(df))
-                
-                # Semester-wise comparison
-                st.subheader("📊 Semester-wise Subject Comparison")
-                for sem_num in df['sem_number']:
-                    with st.expander(f"Semester {int(sem_num)}"):
-                        sem_marks_query = """
-                        SELECT m.subject_code, m.total
-                        FROM semesters s
-                        JOIN marks m ON s.semester_id = m.semester_id
-                        WHERE s.usn = ? AND s.sem_number = ?
-                        ORDER BY m.subject_code
-                        """
-                        sem_marks = pd.read_sql_query(sem_marks_query, conn, params=(usn, sem_num))
-                        
-                        if not sem_marks.empty:
-                            sem_comparison = []
-                            for _, row in sem_marks.iterrows():
-                                branch_avg_query = """
-                                SELECT AVG(m.total) as branch_avg
-                                FROM semesters s
-                                JOIN marks m ON s.semester_id = m.semester_id
-                                WHERE m.subject_code = ? AND s.sem_number = ?
-                                """
-                                branch_avg = pd.read_sql_query(branch_avg_query, conn, params=(row['subject_code'], sem_num))
-                                if not branch_avg.empty and branch_avg.iloc[0]['branch_avg'] is not None:
-                                    sem_comparison.append({
-                                        'Subject': row['subject_code'][:10],
-                                        'Student': row['total'],
-                                        'Branch_Avg': branch_avg.iloc[0]['branch_avg']
-                                    })
-                            
-                            if sem_comparison:
-                                sem_comp_df = pd.DataFrame(sem_comparison)
-                                
-                                fig, ax = plt.subplots(figsize=(10, 5))
-                                x = range(len(sem_comp_df))
-                                width = 0.35
-                                
-                                ax.bar([i - width/2 for i in x], sem_comp_df['Student'], width, label='Student', color='#2ecc71')
-                                ax.bar([i + width/2 for i in x], sem_comp_df['Branch_Avg'], width, label='Branch Avg', color='#e74c3c')
-                                
-                                ax.set_xlabel('Subjects', fontsize=11)
-                                ax.set_ylabel('Total Marks', fontsize=11)
-                                ax.set_title(f'Semester {int(sem_num)} - Subject Comparison', fontsize=12, fontweight='bold')
-                                ax.set_xticks(x)
-                                ax.set_xticklabels(sem_comp_df['Subject'], rotation=45, ha='right')
-                                ax.legend()
-                                ax.grid(True, alpha=0.3, axis='y')
-                                plt.tight_layout()
-                                
-                                st.pyplot(fig)
-                                plt.close(fig)
+                    if cohort_usns and st.button("❌ Remove Cohort"):
+                        removed = db_writer.write(cohort.remove_students, cohort_usns, archive=archive, exclusive=True)
+                        st.success(f"✅ {'Archived' if archive else 'Removed'} {removed} students!")
+                        st.rerun()
                 
-
-            else:
-                st.warning("⚠️ No semester data found! Please enter marks first.")
+                st.markdown("---")
         
-        conn.close()
-    else:
-        st.info("👆 Enter USN and Name to get started!")
-
-# Mode 2: Student Comparison
-else:
-    st.header("🔄 Student Comparison (Same Branch)")
-    
-    conn = sqlite3.connect("student_activity.db")
-    
-    # Get all students for remove dropdown
-    all_students_temp = pd.read_sql_query("SELECT DISTINCT usn, name FROM students ORDER BY usn", conn)
-    
-    # Remove student option
-    if len(all_students_temp) > 0:
-        st.subheader("🗑️ Remove Student")
-        student_to_remove = st.selectbox("Select student to remove:", all_students_temp['usn'].tolist())
+        # Students who have semester data (fresh data), loaded in a fixed number of queries
+        # Read from the columnar snapshot when it is current, otherwise from SQLite
+        with profiler.section("comparison data"):
+            snap = snapshot.current(conn)
+            if snap is not None:
+                series = cache.cached(conn, generation, snapshot.load_comparison_data, snap,
+                                      tuple(sorted(snap.manifest.items())))
+            else:
+                series = cache.cached(conn, generation, queries.load_comparison_data)
+            st.caption("Source: columnar snapshot" if snap is not None else "Source: SQLite")
+            # series is ordered by usn
+            students = series['usn'].drop_duplicates().tolist()
         
-        if st.button("❌ Remove Student"):
-            cursor = conn.cursor()
+        if len(students) > 1:
+            # Past a few dozen students one line per student is unreadable, so the
+            # default switches to percentile bands with optional highlighted students
+            view = st.radio("View:", ["Cohort bands", "Individual lines"], horizontal=True,
+                            index=0 if len(students) > COHORT_VIEW_THRESHOLD else 1)
             
-            cursor.execute("SELECT semester_id FROM semesters WHERE usn = ?", (student_to_remove,))
-            semester_ids = [row[0] for row in cursor.fetchall()]
-            
-            for sem_id in semester_ids:
-                cursor.execute("DELETE FROM marks WHERE semester_id = ?", (sem_id,))
+            if view == "Cohort bands":
+                highlight = st.multiselect("Highlight students:", students, max_selections=5)
+                overlay = series[series['usn'].isin(highlight)]
+                
+                with profiler.section("sgpa chart"):
+                    st.subheader("📊 SGPA Distribution per Semester")
+                    sgpa_bands = queries.cohort_bands(series, 'sgpa')
+                    st.image(charts.render(charts.draw_cohort_bands, sgpa_bands, overlay, 'SGPA'), use_container_width=True)
+                
+                with profiler.section("cgpa chart"):
+                    st.subheader("📊 CGPA Distribution per Semester")
+                    cgpa_bands = queries.cohort_bands(series, 'cgpa')
+                    st.image(charts.render(charts.draw_cohort_bands, cgpa_bands, overlay, 'CGPA'), use_container_width=True)
+                
+                with profiler.section("cgpa histogram"):
+                    hist = queries.cgpa_histogram(series)
+                    st.image(charts.render(charts.draw_cgpa_histogram, hist), use_container_width=True)
+            else:
+                # SGPA per semester comparison
+                with profiler.section("sgpa chart"):
+                    st.subheader("📊 SGPA Comparison per Semester")
+                    st.image(charts.render(charts.draw_comparison_lines, series, 'sgpa', 'SGPA'), use_container_width=True)
+                
+                # CGPA per semester comparison
+                with profiler.section("cgpa chart"):
+                    st.subheader("📊 CGPA Comparison per Semester")
+                    st.image(charts.render(charts.draw_comparison_lines, series, 'cgpa', 'CGPA'), use_container_width=True)
             
-            cursor.execute("DELETE FROM semesters WHERE usn = ?", (student_to_remove,))
-            cursor.execute("DELETE FROM students WHERE usn = ?", (student_to_remove,))
+            # Summary table, ranked and paginated in SQL
+            st.subheader("📊 Overall Summary")
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                order = st.selectbox("Sort by:", list(queries.SUMMARY_ORDER))
+            with col2:
+                page_size = st.selectbox("Rows per page:", [25, 50, 100])
+            with col3:
+                pages = max(1, -(-len(students) // page_size))
+                page = st.number_input(f"Page (of {pages}):", min_value=1, max_value=pages, value=1)
             
-            conn.commit()
-            st.success(f"✅ Student {student_to_remove} removed!")
-            st.rerun()
-        
-        st.markdown("---")
-    
-    # Re-query students who have semester data (fresh data)
-    all_students = pd.read_sql_query("""
-        SELECT DISTINCT s.usn, s.name 
-        FROM students s 
-        JOIN semesters sem ON s.usn = sem.usn 
-        ORDER BY s.usn
-    """, conn)
+            with profiler.section("summary table"):
+                page_df = cache.cached(conn, generation, queries.summary_page, order, page_size, (page - 1) * page_size)
+                # set_axis returns a copy; page_df may be a shared cached frame
+                page_df = page_df.set_axis(range((page - 1) * page_size + 1, (page - 1) * page_size + 1 + len(page_df)))
+                st.dataframe(page_df, use_container_width=True)
+        else:
+            st.info("Add more students to see comparison charts!")
     
-    if len(all_students) > 1:
-        # SGPA per semester comparison
-        st.subheader("📊 SGPA Comparison per Semester")
-        fig, ax = plt.subplots(figsize=(12, 6))
-        
-        for _, student in all_students.iterrows():
-            sgpa_query = "SELECT sem_number, sgpa FROM semesters WHERE usn = ? ORDER BY sem_number"
-            sgpa_data = pd.read_sql_query(sgpa_query, conn, params=(student['usn'],))
-            if not sgpa_data.empty:
-                ax.plot(sgpa_data['sem_number'], sgpa_data['sgpa'], marker='o', linewidth=2, markersize=8, label=student['usn'])
-        
-        ax.set_xlabel('Semester', fontsize=12)
-        ax.set_ylabel('SGPA', fontsize=12)
-        ax.set_title('SGPA Comparison Across Semesters', fontsize=14, fontweight='bold')
-        ax.legend()
-        ax.grid(True, alpha=0.3)
-        ax.set_ylim(0, 10)
-        plt.tight_layout()
-        st.pyplot(fig)
-        plt.close(fig)
-        
-        # CGPA per semester comparison
-        st.subheader("📊 CGPA Comparison per Semester")
-        fig, ax = plt.subplots(figsize=(12, 6))
-        
-        for _, student in all_students.iterrows():
-            sgpa_query = "SELECT sem_number, sgpa FROM semesters WHERE usn = ? ORDER BY sem_number"
-            sgpa_data = pd.read_sql_query(sgpa_query, conn, params=(student['usn'],))
-            if not sgpa_data.empty:
-                cgpa_per_sem = []
-                for i in range(len(sgpa_data)):
-                    cgpa = sgpa_data.iloc[:i+1]['sgpa'].mean()
-                    cgpa_per_sem.append(cgpa)
-                ax.plot(sgpa_data['sem_number'], cgpa_per_sem, marker='o', linewidth=2, markersize=8, label=student['usn'])
+    # Mode 3: Bulk Import
+    else:
+        st.header("📥 Bulk Marks Import")
+        st.markdown("Upload a CSV or Excel file with columns **usn, name, sem_number, subject_code, cie, see** "
+                    "(CIE out of 50, SEE out of 100). Missing students and semesters are created automatically.")
         
-        ax.set_xlabel('Semester', fontsize=12)
-        ax.set_ylabel('CGPA', fontsize=12)
-        ax.set_title('CGPA Comparison Across Semesters', fontsize=14, fontweight='bold')
-        ax.legend()
-        ax.grid(True, alpha=0.3)
-        ax.set_ylim(0, 10)
-        plt.tight_layout()
-        st.pyplot(fig)
-        plt.close(fig)
+        uploaded = st.file_uploader("Marks file:", type=["csv", "xlsx"])
         
-        # Summary table
-        st.subheader("📊 Overall Summary")
-        summary_data = []
-        for _, student in all_students.iterrows():
-            cgpa_query = "SELECT AVG(sgpa) as cgpa FROM semesters WHERE usn = ?"
-            cgpa_result = pd.read_sql_query(cgpa_query, conn, params=(student['usn'],))
-            
-            cie_query = "SELECT AVG(m.cie) as avg_cie FROM semesters s JOIN marks m ON s.semester_id = m.semester_id WHERE s.usn = ?"
-            cie_result = pd.read_sql_query(cie_query, conn, params=(student['usn'],))
+        if uploaded is not None and st.button("Import Marks"):
+            with profiler.section("bulk import"):
+                with st.spinner("Importing..."):
+                    try:
+                        report = db_writer.write(importer.import_marks, uploaded, filename=uploaded.name,
+                                                exclusive=True, timeout=600)
+                    except ValueError as e:
+                        st.error(f"❌ {e}")
+                        report = None
             
-            if not cgpa_result.empty and not cie_result.empty:
-                summary_data.append({
-                    'USN': student['usn'],
-                    'Name': student['name'],
-                    'CGPA': cgpa_result.iloc[0]['cgpa'],
-                    'Avg CIE': cie_result.iloc[0]['avg_cie']
-                })
-        
-        if summary_data:
-            summary_df = pd.DataFrame(summary_data).sort_values('CGPA', ascending=False)
-            st.dataframe(summary_df, use_container_width=True)
-    else:
-        st.info("Add more students to see comparison charts!")
+            if report is not None:
+                st.success(f"✅ Imported {report['imported']} of {report['rows']} rows "
+                           f"in {report['seconds']:.1f}s ({report['rows_per_sec']:.0f} rows/sec)")
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Students Created", report['students_created'])
+                col2.metric("Semesters Created", report['semesters_created'])
+                col3.metric("Rejected Rows", len(report['rejected']))
+                
+                if not report['rejected'].empty:
+                    st.subheader("⚠️ Rejected Rows")
+                    st.dataframe(report['rejected'], use_container_width=True)
     
-    conn.close()
-
-st.markdown("---")
-st.markdown("**🎓 Advanced Python Course Project | Student Performance Visualization Tool**")
+    st.markdown("---")
+    st.markdown("**🎓 Advanced Python Course Project | Student Performance Visualization Tool**")
+    
+    # Profiler: optional debug panel plus one JSON log line per rerun
+    if prof is not None:
+        summary = prof.summary()
+        with st.sidebar:
+            st.markdown("---")
+            if st.checkbox("🐞 Show profiler"):
+                st.caption(f"Rerun: {summary['total_ms']:.0f} ms | SQL: {summary['sql_calls']} calls, "
+                           f"{summary['sql_ms']:.1f} ms | Charts: {summary['render_ms']:.0f} ms")
+                if summary['sections']:
+                    st.dataframe(summary['sections'], use_container_width=True)
+                if summary['renders']:
+                    st.dataframe(summary['renders'], use_container_width=True)
+                repeated = [s for s in summary['top_statements'] if s['repeated']]
+                if repeated:
+                    st.warning(f"⚠️ {len(repeated)} statement(s) repeated more than "
+                               f"{profiler.REPEAT_THRESHOLD} times (possible N+1)")
+                st.dataframe(summary['top_statements'], use_container_width=True)
+finally:
+    profiler.finish(prof, conn, mode=mode)
@@ -0,0 +1,131 @@
+"""Time the dashboard data paths against synthetic databases
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmarks --sizes 100 1000 10000 --output bench_results.json
+
+For each size a fresh database is generated, then every path is run
+`--repeat` times on randomly chosen students. Wall time, SQL statements
+issued and peak Python memory are reported per path and written as JSON
+so results from different versions can be diffed.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+import grading
+import queries
+from benchmarks.synthetic import generate
+from database import open_connection
+
+def _paths(conn, usn, sem, semester_id):
+    return {
+        'sgpa_single': lambda: grading.semester_gpa(conn, [semester_id]),
+        'sgpa_all': lambda: grading.semester_gpa(conn),
+        'personal_sgpa_series': lambda: queries.sgpa_series(conn, usn),
+        'branch_comparison': lambda: queries.semester_comparison(conn, usn, sem),
+        'comparison_loader': lambda: queries.load_comparison_data(conn),
+        'summary_page': lambda: queries.summary_page(conn),
+        'sidebar_stats': lambda: queries.database_stats(conn),
+    }
+
+def measure(func, conn):
+    """Run func twice: once timed with a statement trace, once under tracemalloc
+
+    Returns (seconds, statements, peak bytes). Memory tracing slows Python
+    code down considerably, so it is kept out of the timed run.
+    """
+    statements = []
+    conn.set_trace_callback(statements.append)
+    started = time.perf_counter()
+    try:
+        func()
+        seconds = time.perf_counter() - started
+    finally:
+        conn.set_trace_callback(None)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return seconds, len(statements), peak
+
+def run_size(path, students, repeat, seed):
+    started = time.perf_counter()
+    generate(path, students, seed=seed)
+    generate_seconds = time.perf_counter() - started
+
+    conn = open_connection(path)
+    rng = random.Random(seed)
+    semesters = conn.execute("SELECT semester_id, usn, sem_number FROM semesters").fetchall()
+    results = {}
+    for _ in range(repeat):
+        semester_id, usn, sem = rng.choice(semesters)
+        for name, func in _paths(conn, usn, sem, semester_id).items():
+            results.setdefault(name, []).append(measure(func, conn))
+    conn.close()
+
+    report = {'students': students, 'generate_seconds': round(generate_seconds, 3), 'paths': {}}
+    for name, runs in results.items():
+        seconds = [r[0] for r in runs]
+        report['paths'][name] = {
+            'median_ms': round(statistics.median(seconds) * 1000, 3),
+            'max_ms': round(max(seconds) * 1000, 3),
+            'queries': max(r[1] for r in runs),
+            'peak_kb': round(max(r[2] for r in runs) / 1024, 1),
+        }
+    return report
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', default='bench_activity.db', help='scratch database (recreated per size)')
+    parser.add_argument('--output', default='bench_results.json')
+    args = parser.parse_args(argv)
+
+    runs = []
+    for students in args.sizes:
+        report = run_size(args.db, students, args.repeat, args.seed)
+        runs.append(report)
+        print(f"\n{students} students (generated in {report['generate_seconds']}s)")
+        print(f"  {'path':<22}{'median ms':>12}{'max ms':>12}{'queries':>10}{'peak KB':>12}")
+        for name, r in report['paths'].items():
+            print(f"  {name:<22}{r['median_ms']:>12}{r['max_ms']:>12}{r['queries']:>10}{r['peak_kb']:>12}")
+
+    results = {
+        'revision': _git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'repeat': args.repeat,
+        'seed': args.seed,
+        'runs': runs,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+
+if __name__ == '__main__':
+    main()
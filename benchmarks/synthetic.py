@@ -0,0 +1,56 @@
+import os
+
+import numpy as np
+
+import aggregates
+import grading
+import ranks
+from database import SUBJECT_CATALOG, migrate, open_connection, seed_subjects
+
+def generate(path, students, seed=42, branch="Information Science And Engineering"):
+    """Create a fresh database at `path` filled with seeded synthetic marks
+
+    Every student gets one semester per semester present in the subject
+    catalog, with one mark per catalog subject of that semester. Returns
+    the list of generated USNs.
+    """
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    conn = open_connection(path)
+    migrate(conn)
+    seed_subjects(conn)
+
+    rng = np.random.default_rng(seed)
+    subjects_by_sem = {}
+    for code, _, sem, _, _ in SUBJECT_CATALOG:
+        subjects_by_sem.setdefault(sem, []).append(code)
+    sems = sorted(subjects_by_sem)
+
+    # 1,000 students per admission year keeps USNs in the usual format
+    usns = [f"1BM{20 + i // 1000:02d}IS{i % 1000:03d}" for i in range(students)]
+    conn.executemany("INSERT INTO students (usn, name, branch, sem) VALUES (?, ?, ?, ?)",
+                     [(usn, f"Student {i}", branch, min(len(sems) + 1, 8)) for i, usn in enumerate(usns)])
+    conn.executemany("INSERT INTO semesters (usn, sem_number, sgpa) VALUES (?, ?, 0)",
+                     [(usn, sem) for usn in usns for sem in sems])
+
+    semester_ids = dict(((usn, sem), sid) for sid, usn, sem in
+                        conn.execute("SELECT semester_id, usn, sem_number FROM semesters"))
+    rows = [(semester_ids[(usn, sem)], code) for usn in usns for sem in sems for code in subjects_by_sem[sem]]
+
+    # Each student has an ability level so SGPAs spread out realistically
+    ability = np.repeat(rng.normal(0, 8, students), len(rows) // max(students, 1))
+    cie = np.clip(np.round(rng.normal(35, 7, len(rows)) + ability / 2), 0, 50)
+    see = np.clip(np.round(rng.normal(30, 9, len(rows)) + ability / 2), 0, 50)
+    total = cie + see
+    grades, _ = grading.grade_totals(total)
+    conn.executemany("INSERT INTO marks (semester_id, subject_code, cie, see, total, grade) VALUES (?, ?, ?, ?, ?, ?)",
+                     ((sid, code, int(c), float(s), float(t), g)
+                      for (sid, code), c, s, t, g in zip(rows, cie, see, total, grades.tolist())))
+
+    grading.regrade(conn)
+    aggregates.add_semesters(conn, list(semester_ids.values()))
+    ranks.add_semesters(conn, list(semester_ids.values()))
+    conn.commit()
+    conn.close()
+    return usns
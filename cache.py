@@ -0,0 +1,64 @@
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Process-wide read cache for dashboard queries. Entries are keyed on the
+# query (or loader name), its parameters and the database write generation,
+# so any write that bumps the generation makes older entries unreachable;
+# they age out through LRU eviction. Cached frames are shared between
+# sessions and must be treated as read-only.
+
+MAX_ENTRIES = 256
+
+def current_generation(conn):
+    """Return the database write generation (read once per rerun)"""
+    return conn.execute("SELECT generation FROM write_generation WHERE id = 1").fetchone()[0]
+
+def bump_generation(conn):
+    """Invalidate cached reads; call inside the write's transaction"""
+    conn.execute("UPDATE write_generation SET generation = generation + 1 WHERE id = 1")
+
+class QueryCache:
+    """Bounded LRU cache with hit/miss counters"""
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key, loader):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        
+        # Load outside the lock so slow queries don't serialize other sessions
+        value = loader()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+query_cache = QueryCache()
+
+def read_sql(conn, generation, query, params=()):
+    """pd.read_sql_query through the cache"""
+    params = tuple(params)
+    return query_cache.get_or_load(('sql', query, params, generation),
+                                   lambda: pd.read_sql_query(query, conn, params=params))
+
+def cached(conn, generation, func, *args):
+    """Call func(conn, *args) through the cache; args must be hashable"""
+    return query_cache.get_or_load((func.__module__, func.__qualname__, args, generation),
+                                   lambda: func(conn, *args))
@@ -0,0 +1,227 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+import profiler
+
+# Plotting functions shared by the dashboard, plus a content-addressed cache
+# of rendered PNGs so unchanged charts are not redrawn on every rerun.
+
+MAX_ENTRIES = 128
+MAX_DISK_ENTRIES = 2048
+
+# Same output settings st.pyplot uses, so cached images look identical
+PNG_DPI = 200
+
+# st.image decodes, resizes and re-encodes anything wider than 1460px on
+# every call, so renders are capped just below that width
+MAX_PNG_WIDTH = 1400
+
+_plt = None
+
+def _pyplot():
+    # matplotlib is imported on first draw, so reruns served from the
+    # render cache (and pages without charts) never pay for it
+    global _plt
+    if _plt is None:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        _plt = plt
+    return _plt
+
+def draw_sgpa_trend(df, name, usn, cgpa):
+    """SGPA per semester with the CGPA line"""
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.plot(df['sem_number'], df['sgpa'], marker='o', linewidth=3, markersize=10, color='#1f77b4')
+    ax.axhline(y=cgpa, color='red', linestyle='--', linewidth=2, label=f'CGPA: {cgpa:.2f}')
+
+    for _, row in df.iterrows():
+        ax.annotate(f'{row["sgpa"]:.2f}', (row['sem_number'], row['sgpa']),
+                   textcoords="offset points", xytext=(0,10), ha='center', fontweight='bold')
+
+    ax.set_xlabel('Semester', fontsize=12)
+    ax.set_ylabel('SGPA', fontsize=12)
+    ax.set_title(f'Academic Performance - {name} ({usn})', fontsize=14, fontweight='bold')
+    ax.grid(True, alpha=0.3)
+    ax.legend(fontsize=12)
+    ax.set_ylim(0, 10)
+    fig.tight_layout()
+    return fig
+
+def draw_subject_comparison(sem_comp_df, sem_num):
+    """Student total vs branch average for each subject of one semester"""
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(10, 5))
+    x = range(len(sem_comp_df))
+    width = 0.35
+
+    ax.bar([i - width/2 for i in x], sem_comp_df['Student'], width, label='Student', color='#2ecc71')
+    ax.bar([i + width/2 for i in x], sem_comp_df['Branch_Avg'], width, label='Branch Avg', color='#e74c3c')
+
+    ax.set_xlabel('Subjects', fontsize=11)
+    ax.set_ylabel('Total Marks', fontsize=11)
+    ax.set_title(f'Semester {int(sem_num)} - Subject Comparison', fontsize=12, fontweight='bold')
+    ax.set_xticks(x)
+    ax.set_xticklabels(sem_comp_df['Subject'], rotation=45, ha='right')
+    ax.legend()
+    ax.grid(True, alpha=0.3, axis='y')
+    fig.tight_layout()
+    return fig
+
+def draw_comparison_lines(series, column, label):
+    """One line per student of `column` (sgpa or cgpa) across semesters"""
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(12, 6))
+
+    for student_usn, sgpa_data in series.groupby('usn', sort=False):
+        ax.plot(sgpa_data['sem_number'], sgpa_data[column], marker='o', linewidth=2, markersize=8, label=student_usn)
+
+    ax.set_xlabel('Semester', fontsize=12)
+    ax.set_ylabel(label, fontsize=12)
+    ax.set_title(f'{label} Comparison Across Semesters', fontsize=14, fontweight='bold')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    ax.set_ylim(0, 10)
+    fig.tight_layout()
+    return fig
+
+def draw_cohort_bands(bands, overlay, label):
+    """Percentile bands of `label` across the cohort, with selected students overlaid
+
+    bands comes from queries.cohort_bands; overlay holds series rows for the
+    students to highlight (column named after label in lower case).
+    """
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.fill_between(bands['sem_number'], bands['p10'], bands['p90'], color='#1f77b4', alpha=0.15, label='p10-p90')
+    ax.fill_between(bands['sem_number'], bands['p25'], bands['p75'], color='#1f77b4', alpha=0.3, label='p25-p75')
+    ax.plot(bands['sem_number'], bands['p50'], color='#1f77b4', linewidth=2, linestyle='--', label='Median')
+
+    for student_usn, sgpa_data in overlay.groupby('usn', sort=False):
+        ax.plot(sgpa_data['sem_number'], sgpa_data[label.lower()], marker='o', linewidth=2, markersize=8, label=student_usn)
+
+    ax.set_xlabel('Semester', fontsize=12)
+    ax.set_ylabel(label, fontsize=12)
+    ax.set_title(f'{label} Distribution Across Semesters', fontsize=14, fontweight='bold')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    ax.set_ylim(0, 10)
+    fig.tight_layout()
+    return fig
+
+def draw_cgpa_histogram(hist):
+    """Bar histogram from queries.cgpa_histogram"""
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(12, 4))
+    ax.bar(hist['bin_start'], hist['students'], width=hist['bin_end'] - hist['bin_start'],
+           align='edge', color='#2ecc71', edgecolor='white')
+    ax.set_xlabel('CGPA', fontsize=12)
+    ax.set_ylabel('Students', fontsize=12)
+    ax.set_title('CGPA Distribution', fontsize=14, fontweight='bold')
+    ax.grid(True, alpha=0.3, axis='y')
+    ax.set_xlim(0, 10)
+    fig.tight_layout()
+    return fig
+
+def close(fig):
+    """Release a figure returned by one of the draw functions"""
+    _pyplot().close(fig)
+
+def figure_png(fig):
+    """Rasterize a figure to PNG bytes and close it"""
+    buf = io.BytesIO()
+    dpi = min(PNG_DPI, MAX_PNG_WIDTH / fig.get_figwidth())
+    fig.savefig(buf, format='png', dpi=dpi, bbox_inches='tight')
+    close(fig)
+    return buf.getvalue()
+
+class RenderCache:
+    """LRU cache of PNG bytes with optional spill of evicted entries to disk"""
+
+    def __init__(self, max_entries=MAX_ENTRIES, spill_dir=None, max_disk_entries=MAX_DISK_ENTRIES):
+        self.max_entries = max_entries
+        self.spill_dir = spill_dir
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, f"{key}.png")
+
+    def get(self, key):
+        with self._lock:
+            png = self._entries.get(key)
+            if png is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return png
+
+        if self.spill_dir and os.path.exists(self._spill_path(key)):
+            with open(self._spill_path(key), 'rb') as f:
+                png = f.read()
+            self.put(key, png)
+            with self._lock:
+                self.hits += 1
+            return png
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, png):
+        with self._lock:
+            self._entries[key] = png
+            self._entries.move_to_end(key)
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False))
+
+        if self.spill_dir and evicted:
+            for old_key, old_png in evicted:
+                with open(self._spill_path(old_key), 'wb') as f:
+                    f.write(old_png)
+            self._prune_spill()
+
+    def _prune_spill(self):
+        files = sorted(os.scandir(self.spill_dir), key=lambda e: e.stat().st_mtime)
+        for entry in files[:max(0, len(files) - self.max_disk_entries)]:
+            os.remove(entry.path)
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+# Set CHART_CACHE_DIR to keep evicted renders on disk across LRU churn
+render_cache = RenderCache(spill_dir=os.environ.get("CHART_CACHE_DIR"))
+
+def chart_key(draw, df, *args):
+    """Content hash of a chart's input frames, drawing function and parameters"""
+    h = hashlib.sha256(f"{draw.__qualname__}|{PNG_DPI}|{MAX_PNG_WIDTH}".encode())
+    for value in (df,) + args:
+        if isinstance(value, pd.DataFrame):
+            h.update(repr(list(value.columns)).encode())
+            h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+        else:
+            h.update(repr(value).encode())
+        h.update(b"|")
+    return h.hexdigest()
+
+def render(draw, df, *args):
+    """Return PNG bytes for draw(df, *args), drawing only on a cache miss"""
+    key = chart_key(draw, df, *args)
+    png = render_cache.get(key)
+    with profiler.render(draw.__name__, cached=png is not None):
+        if png is None:
+            png = figure_png(draw(df, *args))
+            render_cache.put(key, png)
+    return png
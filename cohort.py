@@ -0,0 +1,70 @@
+import json
+
+import aggregates
+import cache
+import ranks
+
+# Set-based removal of students, one at a time or a whole cohort at once
+
+def select_cohort(conn, sem=None, branch=None):
+    """Return the USNs of students matching the given semester and/or branch"""
+    clauses, params = [], []
+    if sem is not None:
+        clauses.append("sem = ?")
+        params.append(int(sem))
+    if branch is not None:
+        clauses.append("branch = ?")
+        params.append(branch)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return [row[0] for row in conn.execute(f"SELECT usn FROM students {where} ORDER BY usn", params)]
+
+def remove_students(conn, usns, archive=False):
+    """Delete students with their semesters and marks in one transaction
+
+    Each table is cleared with a single set-based DELETE, so the statement
+    count does not grow with the number of students or semesters. With
+    archive=True the rows are first copied to the *_history tables.
+    Returns the number of students removed.
+    """
+    usns = list(usns)
+    params = (json.dumps(usns),)
+    try:
+        if archive:
+            conn.execute("""
+            INSERT INTO marks_history (mark_id, semester_id, subject_code, cie, see, total, grade)
+            SELECT mark_id, semester_id, subject_code, cie, see, total, grade
+            FROM marks
+            WHERE semester_id IN (
+                SELECT semester_id FROM semesters WHERE usn IN (SELECT value FROM json_each(?))
+            )
+            """, params)
+            conn.execute("""
+            INSERT INTO semesters_history (semester_id, usn, sem_number, sgpa, credits)
+            SELECT semester_id, usn, sem_number, sgpa, credits
+            FROM semesters
+            WHERE usn IN (SELECT value FROM json_each(?))
+            """, params)
+            conn.execute("""
+            INSERT INTO students_history (usn, name, branch, sem)
+            SELECT usn, name, branch, sem
+            FROM students
+            WHERE usn IN (SELECT value FROM json_each(?))
+            """, params)
+        
+        aggregates.remove_students(conn, usns)
+        ranks.remove_students(conn, usns)
+        
+        conn.execute("""
+        DELETE FROM marks
+        WHERE semester_id IN (
+            SELECT semester_id FROM semesters WHERE usn IN (SELECT value FROM json_each(?))
+        )
+        """, params)
+        conn.execute("DELETE FROM semesters WHERE usn IN (SELECT value FROM json_each(?))", params)
+        removed = conn.execute("DELETE FROM students WHERE usn IN (SELECT value FROM json_each(?))", params).rowcount
+        cache.bump_generation(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return removed
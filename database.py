@@ -0,0 +1,507 @@
+import logging
+import queue
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+
+from profiler import ProfiledConnection
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = "student_activity.db"
+
+# Idle connections kept per pool; extra connections are opened on demand
+# and closed when released into a full pool.
+POOL_SIZE = 16
+
+# Page cache per connection, in KiB (negative value for PRAGMA cache_size)
+CACHE_SIZE_KB = 16384
+
+def configure_connection(conn):
+    """Apply WAL journaling and tuned pragmas to a fresh connection"""
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA busy_timeout = 5000")
+    return conn
+
+def open_connection(path=DB_PATH, readonly=False):
+    """Open a configured connection that may be handed between threads"""
+    conn = configure_connection(sqlite3.connect(path, check_same_thread=False, factory=ProfiledConnection))
+    if readonly:
+        # Writes go through the process's writer (see writer.py)
+        conn.execute("PRAGMA query_only = ON")
+    return conn
+
+class ConnectionPool:
+    """Pool of configured SQLite connections for one database file"""
+
+    def __init__(self, path=DB_PATH, size=POOL_SIZE, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def acquire(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            return open_connection(self.path, self.readonly)
+        if conn.in_transaction:
+            conn.rollback()
+        return conn
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def lease(self):
+        """Acquire a connection that goes back to the pool when the lease is dropped"""
+        return Lease(self)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+class Lease:
+    """Holds one pooled connection for the lifetime of its owner (e.g. a session)"""
+
+    def __init__(self, pool):
+        self.conn = pool.acquire()
+        self._finalizer = weakref.finalize(self, pool.release, self.conn)
+
+    def release(self):
+        self._finalizer()
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(path=DB_PATH, readonly=False):
+    """Return the process-wide pool for a database file"""
+    with _pools_lock:
+        pool = _pools.get((path, readonly))
+        if pool is None:
+            pool = _pools[(path, readonly)] = ConnectionPool(path, readonly=readonly)
+        return pool
+
+@contextmanager
+def connection(path=DB_PATH):
+    """Borrow a pooled connection for the duration of a with-block"""
+    with get_pool(path).connection() as conn:
+        yield conn
+
+# Schema migrations: (version, description, function(conn)), applied in order.
+# Each runs in its own transaction and is recorded in schema_version.
+
+def _create_base_tables(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS students (
+        usn TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        branch TEXT NOT NULL,
+        sem INT NOT NULL
+    )
+    """)
+    
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS semesters (
+        semester_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        usn TEXT NOT NULL,
+        sem_number INTEGER NOT NULL,
+        sgpa FLOAT,
+        FOREIGN KEY (usn) REFERENCES students(usn)
+    )
+    """)
+    
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS subjects (
+        code TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        sem INT NOT NULL,
+        branch TEXT,
+        credits INTEGER
+    )
+    """)
+    
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS marks (
+        mark_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        semester_id INTEGER NOT NULL,
+        subject_code TEXT NOT NULL,
+        cie INTEGER,
+        see INTEGER,
+        total INTEGER,
+        grade TEXT,
+        FOREIGN KEY (semester_id) REFERENCES semesters(semester_id),
+        FOREIGN KEY (subject_code) REFERENCES subjects(code)
+    )
+    """)
+
+def _add_secondary_indexes(conn):
+    # Older databases may hold duplicate (usn, sem_number) rows. Keep the one
+    # with the most marks (the newest on a tie) and move the others with
+    # their marks to semesters_duplicates / marks_duplicates
+    duplicates = """
+    SELECT semester_id FROM (
+        SELECT s.semester_id,
+               ROW_NUMBER() OVER (
+                   PARTITION BY s.usn, s.sem_number
+                   ORDER BY (SELECT COUNT(*) FROM marks m WHERE m.semester_id = s.semester_id) DESC,
+                            s.semester_id DESC
+               ) as n
+        FROM semesters s
+    )
+    WHERE n > 1
+    """
+    usns = [row[0] for row in conn.execute(
+        f"SELECT DISTINCT usn FROM semesters WHERE semester_id IN ({duplicates}) ORDER BY usn")]
+    if usns:
+        conn.execute("CREATE TABLE IF NOT EXISTS semesters_duplicates AS SELECT * FROM semesters WHERE 0")
+        conn.execute("CREATE TABLE IF NOT EXISTS marks_duplicates AS SELECT * FROM marks WHERE 0")
+        moved = conn.execute(f"INSERT INTO semesters_duplicates SELECT * FROM semesters WHERE semester_id IN ({duplicates})").rowcount
+        conn.execute("""
+        INSERT INTO marks_duplicates
+        SELECT * FROM marks WHERE semester_id IN (SELECT semester_id FROM semesters_duplicates)
+        """)
+        conn.execute("DELETE FROM marks WHERE semester_id IN (SELECT semester_id FROM semesters_duplicates)")
+        conn.execute("DELETE FROM semesters WHERE semester_id IN (SELECT semester_id FROM semesters_duplicates)")
+        logger.warning("Moved %d duplicate semester row(s) and their marks to semesters_duplicates / "
+                       "marks_duplicates for %d student(s): %s", moved, len(usns), ", ".join(usns))
+    
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_semesters_usn_sem ON semesters (usn, sem_number)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_marks_semester ON marks (semester_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_marks_subject ON marks (subject_code)")
+
+def _create_subject_stats(conn):
+    # Running aggregates of marks.total per subject and semester, kept in step
+    # with marks by aggregates.add_semesters / add_marks / remove_students
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS subject_stats (
+        subject_code TEXT NOT NULL,
+        sem_number INTEGER NOT NULL,
+        n INTEGER NOT NULL,
+        total_sum REAL NOT NULL,
+        total_sq_sum REAL NOT NULL,
+        min_total REAL,
+        max_total REAL,
+        PRIMARY KEY (subject_code, sem_number)
+    )
+    """)
+    conn.execute("DELETE FROM subject_stats")
+    conn.execute("""
+    INSERT INTO subject_stats (subject_code, sem_number, n, total_sum, total_sq_sum, min_total, max_total)
+    SELECT m.subject_code, s.sem_number, COUNT(m.total), SUM(m.total), SUM(m.total * m.total),
+           MIN(m.total), MAX(m.total)
+    FROM semesters s
+    JOIN marks m ON s.semester_id = m.semester_id
+    WHERE m.total IS NOT NULL
+    GROUP BY m.subject_code, s.sem_number
+    """)
+
+def _create_write_generation(conn):
+    # Single-row counter bumped by every data write; read caches key on it
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS write_generation (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        generation INTEGER NOT NULL
+    )
+    """)
+    conn.execute("INSERT OR IGNORE INTO write_generation (id, generation) VALUES (1, 0)")
+
+def _create_history_tables(conn):
+    # Archived copies of removed students, written by cohort.remove_students
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS students_history (
+        usn TEXT NOT NULL,
+        name TEXT NOT NULL,
+        branch TEXT NOT NULL,
+        sem INT NOT NULL,
+        archived_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS semesters_history (
+        semester_id INTEGER NOT NULL,
+        usn TEXT NOT NULL,
+        sem_number INTEGER NOT NULL,
+        sgpa FLOAT,
+        archived_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS marks_history (
+        mark_id INTEGER NOT NULL,
+        semester_id INTEGER NOT NULL,
+        subject_code TEXT NOT NULL,
+        cie INTEGER,
+        see INTEGER,
+        total INTEGER,
+        grade TEXT,
+        archived_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_students_history_usn ON students_history (usn)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_semesters_history_usn ON semesters_history (usn)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_marks_history_semester ON marks_history (semester_id)")
+
+def _create_rank_tables(conn):
+    # Precomputed ranks kept in step with marks by ranks.add_semesters /
+    # ranks.remove_students; percentile is the share of the partition at or
+    # below the student's score
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS subject_ranks (
+        semester_id INTEGER NOT NULL,
+        subject_code TEXT NOT NULL,
+        sem_number INTEGER NOT NULL,
+        branch TEXT NOT NULL,
+        total REAL NOT NULL,
+        rank INTEGER NOT NULL,
+        percentile REAL NOT NULL,
+        cohort_size INTEGER NOT NULL,
+        PRIMARY KEY (semester_id, subject_code)
+    )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_subject_ranks_partition ON subject_ranks (subject_code, sem_number, branch)")
+    
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS cgpa_ranks (
+        usn TEXT PRIMARY KEY,
+        branch TEXT NOT NULL,
+        cgpa REAL NOT NULL,
+        rank INTEGER NOT NULL,
+        percentile REAL NOT NULL,
+        cohort_size INTEGER NOT NULL
+    )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_cgpa_ranks_branch ON cgpa_ranks (branch)")
+    
+    conn.execute("DELETE FROM subject_ranks")
+    conn.execute("""
+    INSERT INTO subject_ranks (semester_id, subject_code, sem_number, branch, total, rank, percentile, cohort_size)
+    SELECT semester_id, subject_code, sem_number, branch, total,
+           RANK() OVER w,
+           100.0 * (COUNT(*) OVER p - RANK() OVER w + 1) / COUNT(*) OVER p,
+           COUNT(*) OVER p
+    FROM (
+        SELECT s.semester_id, m.subject_code, s.sem_number, st.branch, m.total
+        FROM marks m
+        JOIN semesters s ON s.semester_id = m.semester_id
+        JOIN students st ON st.usn = s.usn
+        WHERE m.total IS NOT NULL
+    )
+    WINDOW p AS (PARTITION BY subject_code, sem_number, branch), w AS (p ORDER BY total DESC)
+    """)
+    
+    conn.execute("DELETE FROM cgpa_ranks")
+    conn.execute("""
+    INSERT INTO cgpa_ranks (usn, branch, cgpa, rank, percentile, cohort_size)
+    SELECT usn, branch, cgpa,
+           RANK() OVER w,
+           100.0 * (COUNT(*) OVER p - RANK() OVER w + 1) / COUNT(*) OVER p,
+           COUNT(*) OVER p
+    FROM (
+        SELECT st.usn, st.branch, AVG(s.sgpa) as cgpa
+        FROM students st
+        JOIN semesters s ON st.usn = s.usn
+        GROUP BY st.usn
+    )
+    WINDOW p AS (PARTITION BY branch), w AS (p ORDER BY cgpa DESC)
+    """)
+
+def _create_snapshot_versions(conn):
+    # Change counter per sem_number, bumped by triggers on every table that
+    # feeds the columnar snapshot; snapshot.py re-exports a partition when
+    # its counter moved past the version it last wrote
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS snapshot_versions (
+        sem_number INTEGER PRIMARY KEY,
+        version INTEGER NOT NULL
+    )
+    """)
+    conn.execute("INSERT OR IGNORE INTO snapshot_versions SELECT DISTINCT sem_number, 1 FROM semesters")
+    
+    bump = "UPDATE snapshot_versions SET version = version + 1 WHERE sem_number = {}"
+    for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+        conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS snapshot_semesters_{event.lower()} AFTER {event} ON semesters
+        BEGIN
+            INSERT OR IGNORE INTO snapshot_versions (sem_number, version) VALUES ({row}.sem_number, 0);
+            {bump.format(f"{row}.sem_number")};
+        END
+        """)
+        conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS snapshot_marks_{event.lower()} AFTER {event} ON marks
+        BEGIN
+            {bump.format(f"(SELECT sem_number FROM semesters WHERE semester_id = {row}.semester_id)")};
+        END
+        """)
+    
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS snapshot_students_update AFTER UPDATE ON students
+    BEGIN
+        UPDATE snapshot_versions SET version = version + 1
+        WHERE sem_number IN (SELECT sem_number FROM semesters WHERE usn = NEW.usn);
+    END
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS snapshot_subjects_update AFTER UPDATE ON subjects
+    BEGIN
+        {bump.format("OLD.sem")};
+        {bump.format("NEW.sem")};
+    END
+    """)
+
+def _add_semester_credits(conn):
+    # Credits taken per semester, stored next to sgpa so CGPA can be credit
+    # weighted in SQL: SUM(sgpa * credits) / SUM(credits). Written together
+    # with sgpa by grading.regrade and writer.save_semester
+    conn.execute("ALTER TABLE semesters ADD COLUMN credits INTEGER NOT NULL DEFAULT 0")
+    conn.execute("ALTER TABLE semesters_history ADD COLUMN credits INTEGER NOT NULL DEFAULT 0")
+    conn.execute("""
+    UPDATE semesters
+    SET credits = COALESCE((
+        SELECT SUM(sub.credits)
+        FROM marks m
+        JOIN subjects sub ON sub.code = m.subject_code
+        WHERE m.semester_id = semesters.semester_id
+    ), 0)
+    """)
+    
+    # Re-rank with the credit-weighted CGPA (migration 6 ranked by AVG(sgpa))
+    conn.execute("DELETE FROM cgpa_ranks")
+    conn.execute("""
+    INSERT INTO cgpa_ranks (usn, branch, cgpa, rank, percentile, cohort_size)
+    SELECT usn, branch, cgpa,
+           RANK() OVER w,
+           100.0 * (COUNT(*) OVER p - RANK() OVER w + 1) / COUNT(*) OVER p,
+           COUNT(*) OVER p
+    FROM (
+        SELECT st.usn, st.branch, COALESCE(SUM(s.sgpa * s.credits) / NULLIF(SUM(s.credits), 0), 0) as cgpa
+        FROM students st
+        JOIN semesters s ON st.usn = s.usn
+        GROUP BY st.usn
+    )
+    WINDOW p AS (PARTITION BY branch), w AS (p ORDER BY cgpa DESC)
+    """)
+
+MIGRATIONS = [
+    (1, "base tables", _create_base_tables),
+    (2, "secondary indexes and unique (usn, sem_number)", _add_secondary_indexes),
+    (3, "subject_stats aggregate table", _create_subject_stats),
+    (4, "write_generation counter", _create_write_generation),
+    (5, "history tables for archived students", _create_history_tables),
+    (6, "subject_ranks and cgpa_ranks tables", _create_rank_tables),
+    (7, "snapshot_versions change counters", _create_snapshot_versions),
+    (8, "semester credits and credit-weighted cgpa_ranks", _add_semester_credits),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def schema_version(conn):
+    """Return the highest applied migration version (0 for a new database)"""
+    row = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+    ).fetchone()
+    if row is None:
+        return 0
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+def migrate(conn):
+    """Apply pending migrations in order and return the resulting schema version"""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    
+    for version, description, apply in MIGRATIONS:
+        if version <= schema_version(conn):
+            continue
+        # Take the write lock before re-checking so concurrent processes
+        # starting against the same file apply each migration only once
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM schema_version WHERE version = ?", (version,)).fetchone():
+                conn.rollback()
+                continue
+            apply(conn)
+            conn.execute("INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                         (version, description))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    
+    return schema_version(conn)
+
+# Subject catalog seeded into the subjects table by bootstrap()
+SUBJECT_CATALOG = [
+    ('23MA1BSMCS', 'Mathematical Foundation For CS Stream-1', 1, 'Information Science And Engineering', 4),
+    ('22PH1BSPCS', 'Applied Physics for Computer Science Cluster', 1, 'Information Science And Engineering', 4),
+    ('22CS1ESPOP', 'Principles of programming in C', 1, 'Information Science And Engineering', 3),
+    ('22EC1ESIEL', 'Introduction to Electronics Engineering', 1, 'Information Science And Engineering', 3),
+    ('22ME1AEIDT', 'Innovation and Design Thinking', 1, 'Information Science And Engineering', 1),
+    ('22MA1HSBAK', 'Balake Kannada', 1, 'Information Science And Engineering', 1),
+    ('22CS1ESPYP', 'Introduction to PYTHON Programming', 1, 'Information Science And Engineering', 3),
+    ('22MA1AECEN', 'Communicative English', 1, 'Information Science And Engineering', 1),
+    
+    ('23MA2BSMCS', 'Mathematical Foundation For CS Stream-2', 2, 'Information Science And Engineering', 4),
+    ('22CY2BSCCS', 'Applied Chemistry for Computer Science Engineering Stream', 2, 'Information Science And Engineering', 4),
+    ('22ME2ESCED', 'Computer Aided Engineering Drawing', 2, 'Information Science And Engineering', 3),
+    ('22ME2ESIME', 'Introduction to Mechanical Engineering', 2, 'Information Science And Engineering', 3),
+    ('22EE2ESRES', 'Renewable Energy Sources', 2, 'Information Science And Engineering', 3),
+    ('22MA2HSCIP', 'Constitution of India & Professional Ethics', 2, 'Information Science And Engineering', 1),
+    ('23BT2AESFH', 'Scientific Foundations for Health', 2, 'Information Science And Engineering', 1),
+    
+    ('23MA3BSSDM', 'Statistics and Discrete Mathematics', 3, 'Information Science And Engineering', 3),
+    ('23IS3PCCOA', 'Computer Organization and Architecture', 3, 'Information Science And Engineering', 3),
+    ('23IS3PCDSC', 'Data Structures', 3, 'Information Science And Engineering', 4),
+    ('23IS3PCOOP', 'Object oriented Programming Using C++', 3, 'Information Science And Engineering', 4),
+    ('23IS3PCDLD', 'Digital Logic Design', 3, 'Information Science And Engineering', 3),
+    ('23IS3PCOPS', 'Operating Systems', 3, 'Information Science And Engineering', 4),
+    ('23IS3AEUSP', 'UNIX System Programming', 3, 'Information Science And Engineering', 1)
+]
+
+def seed_subjects(conn):
+    """Insert or update the subject catalog if the table doesn't already match it"""
+    current = set(conn.execute("SELECT code, name, sem, branch, credits FROM subjects").fetchall())
+    if current.issuperset(SUBJECT_CATALOG):
+        return False
+    
+    conn.executemany("""
+    INSERT INTO subjects (code, name, sem, branch, credits) VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (code) DO UPDATE SET
+        name = excluded.name, sem = excluded.sem, branch = excluded.branch, credits = excluded.credits
+    """, SUBJECT_CATALOG)
+    conn.commit()
+    return True
+
+_bootstrapped = set()
+_bootstrap_lock = threading.Lock()
+
+def bootstrap(path=DB_PATH):
+    """Migrate the schema and seed the catalog once per process for a database file"""
+    if path in _bootstrapped:
+        return
+    with _bootstrap_lock:
+        if path in _bootstrapped:
+            return
+        with connection(path) as conn:
+            if schema_version(conn) < SCHEMA_VERSION:
+                migrate(conn)
+            seed_subjects(conn)
+        _bootstrapped.add(path)
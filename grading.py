@@ -0,0 +1,125 @@
+"""Grade cutoffs, SGPA and cohort regrades
+
+    python grading.py --db student_activity.db
+
+Run as a script to regrade every semester with the current cutoffs, e.g.
+after changing GRADE_CUTOFFS.
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+
+import cache
+import ranks
+from database import DB_PATH, bootstrap, open_connection
+
+# A total at or above GRADE_CUTOFFS[i] earns GRADE_LABELS[i + 1]
+GRADE_CUTOFFS = np.array([50, 60, 70, 80, 90])
+GRADE_LABELS = np.array(['F', 'B', 'B+', 'A', 'A+', 'O'])
+
+GRADE_POINTS = {'O': 10, 'A+': 9, 'A': 8, 'B+': 7, 'B': 6, 'F': 0}
+GRADE_POINT_VALUES = np.array([GRADE_POINTS[g] for g in GRADE_LABELS])
+
+def grade_totals(totals):
+    """Map an array of totals to (grades, grade points) in one vectorized pass"""
+    idx = np.searchsorted(GRADE_CUTOFFS, np.asarray(totals, dtype=float), side='right')
+    return GRADE_LABELS[idx], GRADE_POINT_VALUES[idx]
+
+def grade_for(total):
+    """Return the letter grade for a single total"""
+    return str(grade_totals([total])[0][0])
+
+def _id_filter(column, ids):
+    # A single JSON parameter keeps large id lists clear of SQLite's variable limit
+    if ids is None:
+        return "", ()
+    return f"WHERE {column} IN (SELECT value FROM json_each(?))", (json.dumps([int(i) for i in ids]),)
+
+def semester_gpa(conn, semester_ids=None):
+    """Compute credit-weighted SGPA for many semesters with one grouped query
+
+    Returns a DataFrame with semester_id, usn, sem_number, credits and sgpa.
+    Semesters without marks get sgpa 0. Pass None for every semester.
+    """
+    where, params = _id_filter("sem.semester_id", semester_ids)
+    rows = pd.read_sql_query(f"""
+        SELECT sem.semester_id, sem.usn, sem.sem_number, m.grade, SUM(s.credits) as credits
+        FROM semesters sem
+        LEFT JOIN marks m ON sem.semester_id = m.semester_id
+        LEFT JOIN subjects s ON m.subject_code = s.code
+        {where}
+        GROUP BY sem.semester_id, m.grade
+    """, conn, params=params)
+
+    rows['credits'] = rows['credits'].fillna(0)
+    rows['points'] = rows['grade'].map(GRADE_POINTS).fillna(0) * rows['credits']
+    gpa = rows.groupby(['semester_id', 'usn', 'sem_number'], as_index=False)[['credits', 'points']].sum()
+    gpa['sgpa'] = (gpa['points'] / gpa['credits'].where(gpa['credits'] > 0)).fillna(0)
+    return gpa.drop(columns='points')
+
+def cgpa(gpa):
+    """Credit-weighted CGPA per usn from a frame with usn, sgpa and credits
+
+    Takes semester_gpa output or semesters rows. Students without credits
+    get 0, like sgpa.
+    """
+    weighted = (gpa['sgpa'] * gpa['credits']).groupby(gpa['usn'], sort=False).sum()
+    credits = gpa.groupby('usn', sort=False)['credits'].sum()
+    return (weighted / credits.where(credits > 0)).fillna(0).rename('cgpa')
+
+def regrade(conn, semester_ids=None):
+    """Re-derive grades from totals and refresh SGPA for the given semesters
+
+    Uses the current cutoffs, so a whole cohort can be regraded after they
+    change. Also stores each semester's credits for the CGPA. Runs inside
+    the caller's transaction; returns the number of marks whose grade
+    changed. Leaves cgpa_ranks and cached reads stale, see regrade_cohort.
+    """
+    where, params = _id_filter("semester_id", semester_ids)
+    marks = pd.read_sql_query(f"SELECT mark_id, total, grade FROM marks {where}", conn, params=params)
+
+    grades, _ = grade_totals(marks['total'].fillna(0))
+    changed = marks['grade'].to_numpy() != grades
+    conn.executemany("UPDATE marks SET grade = ? WHERE mark_id = ?",
+                     zip(grades[changed].tolist(), marks['mark_id'][changed].tolist()))
+
+    gpa = semester_gpa(conn, semester_ids)
+    conn.executemany("UPDATE semesters SET sgpa = ?, credits = ? WHERE semester_id = ?",
+                     zip(gpa['sgpa'].tolist(), gpa['credits'].astype(int).tolist(), gpa['semester_id'].tolist()))
+    return int(changed.sum())
+
+def regrade_cohort(conn, semester_ids=None):
+    """regrade, then re-rank the affected branches and invalidate cached reads
+
+    Runs inside the caller's transaction; returns the number of marks whose
+    grade changed.
+    """
+    changed = regrade(conn, semester_ids)
+    if semester_ids is None:
+        semester_ids = [row[0] for row in conn.execute("SELECT semester_id FROM semesters")]
+    ranks.add_semesters(conn, semester_ids)
+    cache.bump_generation(conn)
+    return changed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Regrade every semester with the current grade cutoffs")
+    parser.add_argument('--db', default=DB_PATH)
+    args = parser.parse_args(argv)
+
+    bootstrap(args.db)
+    conn = open_connection(args.db)
+    try:
+        # Take the write lock up front; the dashboard's writer may be running
+        conn.execute("BEGIN IMMEDIATE")
+        changed = regrade_cohort(conn)
+        conn.commit()
+    finally:
+        conn.close()
+    print(f"Regraded: {changed} grade(s) changed")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
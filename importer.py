@@ -0,0 +1,186 @@
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import aggregates
+import cache
+import grading
+import ranks
+
+DEFAULT_BRANCH = "Information Science And Engineering"
+
+# Expected columns; name is optional and only used for new students.
+# see is out of 100, as on the entry form, and is stored halved.
+REQUIRED_COLUMNS = ['usn', 'sem_number', 'subject_code', 'cie', 'see']
+
+USN_PATTERN = r'^[0-9][A-Z]{2}[0-9]{2}[A-Z]{2}[0-9]{3}$'
+
+def read_chunks(source, chunksize=5000, filename=None):
+    """Yield DataFrame chunks from a CSV or Excel path or file-like object"""
+    filename = filename or (source if isinstance(source, str) else getattr(source, 'name', ''))
+    extension = os.path.splitext(str(filename))[1].lower()
+    if extension == '.xls':
+        # pandas needs xlrd for the legacy format, which is not a dependency
+        raise ValueError("Legacy .xls files are not supported; save the sheet as .xlsx or .csv")
+    if extension == '.xlsx':
+        # Excel files cannot be streamed by pandas; slice the sheet instead
+        sheet = pd.read_excel(source)
+        for start in range(0, len(sheet), chunksize):
+            yield sheet.iloc[start:start + chunksize]
+    else:
+        yield from pd.read_csv(source, chunksize=chunksize)
+
+def _normalize(chunk, first_row):
+    chunk = chunk.rename(columns=lambda c: str(c).strip().lower())
+    if 'sem_number' not in chunk.columns and 'sem' in chunk.columns:
+        chunk = chunk.rename(columns={'sem': 'sem_number'})
+    missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+
+    chunk = chunk.copy()
+    chunk.index = pd.RangeIndex(first_row, first_row + len(chunk), name='row')
+    chunk['usn'] = chunk['usn'].astype(str).str.strip().str.upper()
+    chunk['subject_code'] = chunk['subject_code'].astype(str).str.strip().str.upper()
+    if 'name' not in chunk.columns:
+        chunk['name'] = chunk['usn']
+    chunk['name'] = chunk['name'].fillna(chunk['usn']).astype(str).str.strip()
+    for col in ('sem_number', 'cie', 'see'):
+        chunk[col] = pd.to_numeric(chunk[col], errors='coerce')
+    return chunk
+
+def _reject_reasons(chunk, subject_sems):
+    reason = pd.Series('', index=chunk.index)
+    checks = [
+        (~chunk['usn'].str.match(USN_PATTERN), "invalid USN"),
+        (~chunk['subject_code'].isin(subject_sems.keys()), "unknown subject code"),
+        (chunk['subject_code'].map(subject_sems) != chunk['sem_number'], "subject not in this semester"),
+        (~chunk['cie'].between(0, 50), "CIE out of range"),
+        (~chunk['see'].between(0, 100), "SEE out of range"),
+        (chunk.duplicated(['usn', 'sem_number', 'subject_code']), "duplicate row"),
+    ]
+    # Report the first failing check for each row
+    for failed, message in reversed(checks):
+        reason = reason.mask(failed.fillna(True), message)
+    return reason
+
+def _semester_ids(conn, usns):
+    return pd.read_sql_query("""
+        SELECT usn, sem_number, semester_id FROM semesters
+        WHERE usn IN (SELECT value FROM json_each(?))
+    """, conn, params=(json.dumps(list(usns)),))
+
+def import_marks(conn, source, chunksize=5000, filename=None, branch=DEFAULT_BRANCH):
+    """Bulk-load marks from a CSV/Excel file, one transaction per chunk
+
+    Creates missing students and semesters and inserts marks with
+    executemany; each chunk's transaction also grades its semesters and
+    updates subject_stats, and ranks are refreshed once at the end.
+    Semesters that already held data before the import are left alone and
+    their rows are rejected, matching the entry form. Returns a report dict;
+    rejected rows are keyed by their 1-based data row number in the file.
+    """
+    started = time.perf_counter()
+    subject_sems = dict(conn.execute("SELECT code, sem FROM subjects").fetchall())
+
+    # semester_id -> subject codes loaded by this import
+    loaded = {}
+    # Already recorded semesters are re-ranked too, which finishes the
+    # ranking of an earlier import that was interrupted
+    reranked = set()
+    rows = 0
+    imported = 0
+    students_created = 0
+    rejected = []
+
+    completed = False
+    try:
+        for chunk in read_chunks(source, chunksize, filename):
+            chunk = _normalize(chunk, rows + 1)
+            rows += len(chunk)
+            chunk['reason'] = _reject_reasons(chunk, subject_sems)
+            valid = chunk[chunk['reason'] == '']
+
+            try:
+                before = conn.total_changes
+                conn.executemany(
+                    "INSERT OR IGNORE INTO students (usn, name, branch, sem) VALUES (?, ?, ?, ?)",
+                    [(usn, group['name'].iloc[0], branch, int(min(group['sem_number'].max() + 1, 8)))
+                     for usn, group in valid.groupby('usn')])
+                students_created += conn.total_changes - before
+
+                # Semesters recorded before this import are not overwritten
+                ids = _semester_ids(conn, valid['usn'].unique())
+                ids = ids[~ids['semester_id'].isin(loaded.keys())]
+                recorded = valid.reset_index().merge(ids, on=['usn', 'sem_number']).set_index('row')
+                chunk.loc[recorded.index, 'reason'] = "semester already recorded"
+                reranked.update(recorded['semester_id'].tolist())
+                valid = chunk[chunk['reason'] == '']
+
+                conn.executemany("INSERT OR IGNORE INTO semesters (usn, sem_number, sgpa) VALUES (?, ?, 0)",
+                                 valid[['usn', 'sem_number']].drop_duplicates().astype(object).itertuples(index=False))
+                ids = _semester_ids(conn, valid['usn'].unique())
+                valid = valid.reset_index().merge(ids, on=['usn', 'sem_number']).set_index('row')
+
+                # The same subject may reappear for a semester in a later chunk
+                seen = [code in loaded.get(sid, ()) for sid, code in zip(valid['semester_id'], valid['subject_code'])]
+                chunk.loc[valid.index[seen], 'reason'] = "duplicate row"
+                valid = valid[~np.array(seen, dtype=bool)]
+
+                see = valid['see'] / 2
+                total = valid['cie'] + see
+                grades, _ = grading.grade_totals(total)
+                last_mark = conn.execute("SELECT COALESCE(MAX(mark_id), 0) FROM marks").fetchone()[0]
+                conn.executemany(
+                    "INSERT INTO marks (semester_id, subject_code, cie, see, total, grade) VALUES (?, ?, ?, ?, ?, ?)",
+                    zip(valid['semester_id'].tolist(), valid['subject_code'].tolist(),
+                        valid['cie'].tolist(), see.tolist(), total.tolist(), grades.tolist()))
+                
+                # Each chunk leaves its semesters graded and aggregated, so a
+                # failure in a later chunk cannot strand them half-imported
+                touched = valid['semester_id'].unique().tolist()
+                mark_ids = [row[0] for row in conn.execute("SELECT mark_id FROM marks WHERE mark_id > ?", (last_mark,))]
+                grading.regrade(conn, touched)
+                aggregates.add_marks(conn, mark_ids)
+                cache.bump_generation(conn)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+            for sid, code in zip(valid['semester_id'], valid['subject_code']):
+                loaded.setdefault(int(sid), set()).add(code)
+            imported += len(valid)
+            bad = chunk[chunk['reason'] != '']
+            if not bad.empty:
+                rejected.append(bad[['usn', 'sem_number', 'subject_code', 'reason']].reset_index())
+
+        completed = True
+    finally:
+        # Ranks are recomputed rather than accumulated, so they are refreshed
+        # once for every committed chunk, including after a failed one
+        try:
+            reranked.update(loaded)
+            if reranked:
+                ranks.add_semesters(conn, list(reranked))
+                cache.bump_generation(conn)
+                conn.commit()
+        except Exception:
+            conn.rollback()
+            if completed:
+                raise
+
+    seconds = time.perf_counter() - started
+    return {
+        'rows': rows,
+        'imported': imported,
+        'rejected': (pd.concat(rejected, ignore_index=True) if rejected
+                     else pd.DataFrame(columns=['row', 'usn', 'sem_number', 'subject_code', 'reason'])),
+        'students_created': students_created,
+        'semesters_created': len(loaded),
+        'seconds': seconds,
+        'rows_per_sec': rows / seconds if seconds > 0 else 0,
+    }
@@ -0,0 +1,171 @@
+import contextvars
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Per-rerun instrumentation: SQL statements with timings, named sections
+# and chart renders. Collection is a perf_counter call and a list append
+# per event, so it is on by default; set DASHBOARD_PROFILE=0 to disable.
+
+ENABLED = os.environ.get("DASHBOARD_PROFILE", "1") != "0"
+
+# A statement text repeated more often than this in one rerun is flagged
+# as a likely N+1 pattern
+REPEAT_THRESHOLD = 10
+
+logger = logging.getLogger("dashboard.profile")
+if not logger.handlers:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_current = contextvars.ContextVar("profiler", default=None)
+
+def current():
+    """Return the profiler active in this thread/context, if any"""
+    return _current.get()
+
+class Profiler:
+    """Collects timings for one rerun (or one CLI run)"""
+
+    def __init__(self, label="rerun"):
+        self.label = label
+        self.started = time.perf_counter()
+        self.statements = []   # (sql, seconds, section)
+        self.executed = 0      # statements reported by SQLite's trace callback
+        self.sections = []     # (name, seconds, statements)
+        self.renders = []      # (name, seconds, cached)
+        self._stack = []
+
+    def _trace(self, sql):
+        self.executed += 1
+
+    def record_statement(self, sql, seconds):
+        self.statements.append((sql, seconds, self._stack[-1] if self._stack else None))
+
+    def record_render(self, name, seconds, cached):
+        self.renders.append((name, seconds, cached))
+
+    @contextmanager
+    def section(self, name):
+        self._stack.append(name)
+        before = len(self.statements)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sections.append((name, time.perf_counter() - started, len(self.statements) - before))
+            self._stack.pop()
+
+    def summary(self):
+        by_sql = Counter()
+        sql_seconds = Counter()
+        for sql, seconds, _ in self.statements:
+            key = " ".join(sql.split())
+            by_sql[key] += 1
+            sql_seconds[key] += seconds
+        top = [{'sql': sql[:200], 'count': count, 'ms': round(sql_seconds[sql] * 1000, 3),
+                'repeated': count > REPEAT_THRESHOLD}
+               for sql, count in by_sql.most_common(10)]
+        return {
+            'label': self.label,
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 3),
+            'sql_calls': len(self.statements),
+            'sql_statements': self.executed,
+            'sql_ms': round(sum(s[1] for s in self.statements) * 1000, 3),
+            'render_ms': round(sum(r[1] for r in self.renders) * 1000, 3),
+            'sections': [{'name': name, 'ms': round(seconds * 1000, 3), 'sql_calls': n}
+                         for name, seconds, n in self.sections],
+            'renders': [{'name': name, 'ms': round(seconds * 1000, 3), 'cached': cached}
+                        for name, seconds, cached in self.renders],
+            'top_statements': top,
+        }
+
+def start(conn=None, label="rerun"):
+    """Activate a Profiler for the rest of this context (e.g. a Streamlit script run)"""
+    if not ENABLED:
+        return None
+    prof = Profiler(label)
+    _current.set(prof)
+    if conn is not None:
+        conn.set_trace_callback(prof._trace)
+    return prof
+
+def emit(prof, **fields):
+    """Write one structured JSON log line for a finished profile"""
+    if prof is not None:
+        logger.info(json.dumps({**prof.summary(), **fields}))
+
+def finish(prof, conn=None, **fields):
+    """Deactivate a profiler started with start() and emit its log line"""
+    if prof is None:
+        return
+    if conn is not None:
+        conn.set_trace_callback(None)
+    _current.set(None)
+    emit(prof, **fields)
+
+@contextmanager
+def section(name):
+    """Time a named section under the active profiler (no-op when none)"""
+    prof = _current.get()
+    if prof is None:
+        yield
+    else:
+        with prof.section(name):
+            yield
+
+@contextmanager
+def render(name, cached):
+    """Time a chart render under the active profiler"""
+    prof = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if prof is not None:
+            prof.record_render(name, time.perf_counter() - started, cached)
+
+class ProfiledCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        prof = _current.get()
+        if prof is None:
+            return super().execute(sql, parameters)
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            prof.record_statement(sql, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        prof = _current.get()
+        if prof is None:
+            return super().executemany(sql, seq_of_parameters)
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            prof.record_statement(sql, time.perf_counter() - started)
+
+class ProfiledConnection(sqlite3.Connection):
+    """Connection whose statements are timed while a profiler is active
+
+    pandas.read_sql_query goes through cursor(), and conn.execute bypasses
+    it in C, so both paths are routed through ProfiledCursor.
+    """
+
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+import aggregates
+
+# Set-based loaders for the dashboard views. Each issues a fixed number of
+# queries regardless of how many students are in the database.
+
+def database_stats(conn):
+    """Row counts shown in the sidebar"""
+    counts = pd.read_sql_query("""
+        SELECT (SELECT COUNT(*) FROM students) as students,
+               (SELECT COUNT(*) FROM semesters) as semesters,
+               (SELECT COUNT(*) FROM marks) as marks
+    """, conn).iloc[0]
+    return {name: int(value) for name, value in counts.items()}
+
+def sgpa_series(conn, usn):
+    """One student's SGPA and credits per semester"""
+    query = "SELECT usn, sem_number, sgpa, credits FROM semesters WHERE usn = ? ORDER BY sem_number"
+    return pd.read_sql_query(query, conn, params=(usn,))
+
+def semester_comparison(conn, usn, sem_number):
+    """A student's subject totals for one semester next to the branch averages"""
+    sem_marks = pd.read_sql_query("""
+        SELECT m.subject_code, m.total
+        FROM semesters s
+        JOIN marks m ON s.semester_id = m.semester_id
+        WHERE s.usn = ? AND s.sem_number = ?
+        ORDER BY m.subject_code
+    """, conn, params=(usn, int(sem_number)))
+    
+    if sem_marks.empty:
+        return pd.DataFrame(columns=['Subject', 'Student', 'Branch_Avg'])
+    
+    return subject_comparison_frame(sem_marks, aggregates.branch_averages(conn, sem_number))
+
+def subject_comparison_frame(sem_marks, branch_avg):
+    """Chart frame from subject_code/total rows and aggregates.branch_averages output"""
+    sem_comp_df = sem_marks.merge(branch_avg, on='subject_code')
+    return pd.DataFrame({
+        'Subject': sem_comp_df['subject_code'].str[:10],
+        'Student': sem_comp_df['total'],
+        'Branch_Avg': sem_comp_df['branch_avg']
+    })
+
+def load_comparison_data(conn):
+    """Load the SGPA/CGPA series for every student with semester data
+    
+    One row per (usn, sem_number) with name, sgpa, credits and running cgpa,
+    ordered by usn. The summary table is paged separately by summary_page.
+    """
+    series = pd.read_sql_query("""
+        SELECT sem.usn, s.name, sem.sem_number, sem.sgpa, sem.credits
+        FROM semesters sem
+        JOIN students s ON s.usn = sem.usn
+        ORDER BY sem.usn, sem.sem_number
+    """, conn)
+    
+    return comparison_series(series)
+
+def comparison_series(series):
+    """Add the running cgpa to per-semester sgpa/credits rows ordered by usn"""
+    # Running credit-weighted CGPA; its last value per student is grading.cgpa
+    points = (series['sgpa'] * series['credits']).groupby(series['usn'], sort=False).cumsum()
+    credits = series.groupby('usn', sort=False)['credits'].cumsum()
+    series['cgpa'] = (points / credits.where(credits > 0)).fillna(0)
+    return series
+
+COHORT_PERCENTILES = [0.1, 0.25, 0.5, 0.75, 0.9]
+
+def cohort_bands(series, column):
+    """Per-semester p10/p25/median/p75/p90 of `column` (sgpa or cgpa) across students"""
+    bands = series.groupby('sem_number')[column].quantile(COHORT_PERCENTILES).unstack()
+    bands.columns = ['p10', 'p25', 'p50', 'p75', 'p90']
+    bands['students'] = series.groupby('sem_number')[column].count()
+    return bands.reset_index()
+
+def cgpa_histogram(series, bins=20):
+    """Histogram of final CGPA on a fixed 0-10 scale from a comparison series"""
+    final = series.groupby('usn', sort=False)['cgpa'].last()
+    counts, edges = np.histogram(final.dropna(), bins=bins, range=(0, 10))
+    return pd.DataFrame({'bin_start': edges[:-1], 'bin_end': edges[1:], 'students': counts})
+
+# Whitelisted ORDER BY clauses for summary_page
+SUMMARY_ORDER = {
+    'CGPA (high to low)': 'cgpa DESC, usn',
+    'CGPA (low to high)': 'cgpa ASC, usn',
+    'USN': 'usn',
+}
+
+def summary_page(conn, order='CGPA (high to low)', limit=25, offset=0):
+    """One page of the overall summary, ranked and sliced in SQL
+
+    CIE averages are only computed for the students on the page.
+    """
+    order_by = SUMMARY_ORDER[order]
+    return pd.read_sql_query(f"""
+        WITH page AS (
+            SELECT usn, COALESCE(SUM(sgpa * credits) / NULLIF(SUM(credits), 0), 0) as cgpa
+            FROM semesters
+            GROUP BY usn
+            ORDER BY {order_by}
+            LIMIT ? OFFSET ?
+        )
+        SELECT p.usn as USN, s.name as Name, p.cgpa as CGPA, AVG(m.cie) as "Avg CIE"
+        FROM page p
+        JOIN students s ON s.usn = p.usn
+        LEFT JOIN semesters sem ON sem.usn = p.usn
+        LEFT JOIN marks m ON m.semester_id = sem.semester_id
+        GROUP BY p.usn
+        ORDER BY {order_by}
+    """, conn, params=(int(limit), int(offset)))
@@ -0,0 +1,95 @@
+import json
+
+import pandas as pd
+
+# Maintenance and lookup for the precomputed subject_ranks and cgpa_ranks
+# tables. Ranks are recomputed with window functions, but only for the
+# (subject_code, sem_number, branch) partitions and branches a write touched.
+# Writers call these inside their own transaction; nothing here commits.
+
+_SUBJECT_KEYS = """
+    SELECT m.subject_code, s.sem_number, st.branch
+    FROM semesters s
+    JOIN marks m ON s.semester_id = m.semester_id
+    JOIN students st ON st.usn = s.usn
+    WHERE {where}
+"""
+
+_BRANCHES = """
+    SELECT st.branch
+    FROM students st
+    JOIN semesters s ON st.usn = s.usn
+    WHERE {where}
+"""
+
+def _refresh(conn, where, params, excluded=()):
+    # where selects the written rows; excluded students are about to be
+    # deleted and are left out of the recomputed partitions
+    keys = _SUBJECT_KEYS.format(where=where)
+    branches = _BRANCHES.format(where=where)
+    excluded = json.dumps(list(excluded))
+
+    conn.execute(f"DELETE FROM subject_ranks WHERE (subject_code, sem_number, branch) IN ({keys})", params)
+    conn.execute(f"""
+    INSERT INTO subject_ranks (semester_id, subject_code, sem_number, branch, total, rank, percentile, cohort_size)
+    SELECT semester_id, subject_code, sem_number, branch, total,
+           RANK() OVER w,
+           100.0 * (COUNT(*) OVER p - RANK() OVER w + 1) / COUNT(*) OVER p,
+           COUNT(*) OVER p
+    FROM (
+        SELECT s.semester_id, m.subject_code, s.sem_number, st.branch, m.total
+        FROM marks m
+        JOIN semesters s ON s.semester_id = m.semester_id
+        JOIN students st ON st.usn = s.usn
+        WHERE m.total IS NOT NULL
+          AND (m.subject_code, s.sem_number, st.branch) IN ({keys})
+          AND s.usn NOT IN (SELECT value FROM json_each(?))
+    )
+    WINDOW p AS (PARTITION BY subject_code, sem_number, branch), w AS (p ORDER BY total DESC)
+    """, params + (excluded,))
+
+    # A CGPA change moves every other student in the branch, so whole
+    # branches are re-ranked. CGPA is credit weighted (see grading.cgpa)
+    conn.execute(f"DELETE FROM cgpa_ranks WHERE branch IN ({branches})", params)
+    conn.execute(f"""
+    INSERT INTO cgpa_ranks (usn, branch, cgpa, rank, percentile, cohort_size)
+    SELECT usn, branch, cgpa,
+           RANK() OVER w,
+           100.0 * (COUNT(*) OVER p - RANK() OVER w + 1) / COUNT(*) OVER p,
+           COUNT(*) OVER p
+    FROM (
+        SELECT st.usn, st.branch, COALESCE(SUM(s.sgpa * s.credits) / NULLIF(SUM(s.credits), 0), 0) as cgpa
+        FROM students st
+        JOIN semesters s ON st.usn = s.usn
+        WHERE st.branch IN ({branches})
+          AND st.usn NOT IN (SELECT value FROM json_each(?))
+        GROUP BY st.usn
+    )
+    WINDOW p AS (PARTITION BY branch), w AS (p ORDER BY cgpa DESC)
+    """, params + (excluded,))
+
+def add_semesters(conn, semester_ids):
+    """Re-rank every subject partition and branch touched by new semesters"""
+    _refresh(conn, "s.semester_id IN (SELECT value FROM json_each(?))",
+             (json.dumps([int(i) for i in semester_ids]),))
+
+def remove_students(conn, usns):
+    """Re-rank the partitions of students about to be deleted, without them; call before deleting"""
+    usns = list(usns)
+    _refresh(conn, "s.usn IN (SELECT value FROM json_each(?))", (json.dumps(usns),), excluded=usns)
+
+def student_rank(conn, usn):
+    """Return a student's CGPA rank row (rank, cohort_size, percentile, cgpa) or None"""
+    return conn.execute(
+        "SELECT rank, cohort_size, percentile, cgpa FROM cgpa_ranks WHERE usn = ?", (usn,)
+    ).fetchone()
+
+def subject_ranks(conn, usn, sem_number):
+    """A student's rank and percentile in each subject of one semester"""
+    return pd.read_sql_query("""
+    SELECT r.subject_code, r.total, r.rank, r.cohort_size, r.percentile
+    FROM semesters s
+    JOIN subject_ranks r ON r.semester_id = s.semester_id
+    WHERE s.usn = ? AND s.sem_number = ?
+    ORDER BY r.subject_code
+    """, conn, params=(usn, int(sem_number)))
@@ -0,0 +1,146 @@
+"""Render report cards for a whole cohort without Streamlit
+
+    python report_cards.py --out report_cards --format pdf --workers 8
+
+Each student gets the SGPA trend chart and one subject comparison chart
+per semester, the same charts as Generate Graph. All data is fetched up
+front in a handful of queries and the rendering is spread across a
+process pool. Finished files are written atomically, so a rerun after a
+failure or interruption skips students that are already done (use
+--force to redo them).
+"""
+import argparse
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import aggregates
+import charts
+import grading
+import queries
+from database import DB_PATH, bootstrap, connection
+
+def load_reports(conn, usns=None):
+    """Fetch everything needed for the report cards in bulk
+
+    Returns a list of (usn, name, sgpa series, [(sem_number, chart frame), ...]).
+    """
+    students = pd.read_sql_query("""
+        SELECT DISTINCT s.usn, s.name
+        FROM students s
+        JOIN semesters sem ON s.usn = sem.usn
+        ORDER BY s.usn
+    """, conn)
+    if usns:
+        students = students[students['usn'].isin(usns)]
+
+    series = pd.read_sql_query(
+        "SELECT usn, sem_number, sgpa, credits FROM semesters ORDER BY usn, sem_number", conn)
+    marks = pd.read_sql_query("""
+        SELECT s.usn, s.sem_number, m.subject_code, m.total
+        FROM semesters s
+        JOIN marks m ON s.semester_id = m.semester_id
+        ORDER BY s.usn, s.sem_number, m.subject_code
+    """, conn)
+    branch_avgs = {int(sem): aggregates.branch_averages(conn, sem) for sem in series['sem_number'].unique()}
+
+    series_by_usn = dict(tuple(series.groupby('usn')))
+    marks_by_key = dict(tuple(marks.groupby(['usn', 'sem_number'])))
+
+    reports = []
+    for usn, name in students.itertuples(index=False):
+        df = series_by_usn[usn][['usn', 'sem_number', 'sgpa', 'credits']].reset_index(drop=True)
+        semesters = []
+        for sem_num in df['sem_number']:
+            sem_marks = marks_by_key.get((usn, sem_num))
+            if sem_marks is not None:
+                sem_comp_df = queries.subject_comparison_frame(sem_marks, branch_avgs[int(sem_num)])
+                if not sem_comp_df.empty:
+                    semesters.append((int(sem_num), sem_comp_df))
+        reports.append((usn, name, df, semesters))
+    return reports
+
+def output_path(out_dir, usn, fmt):
+    return os.path.join(out_dir, f"{usn}.{fmt}")
+
+def render_report(report, out_dir, fmt):
+    """Render one student's report card; runs in a worker process"""
+    usn, name, df, semesters = report
+    path = output_path(out_dir, usn, fmt)
+    tmp_path = f"{path}.tmp"
+
+    figures = [charts.draw_sgpa_trend(df, name, usn, float(grading.cgpa(df).iloc[0]))]
+    figures += [charts.draw_subject_comparison(sem_comp_df, sem_num) for sem_num, sem_comp_df in semesters]
+    try:
+        if fmt == 'pdf':
+            from matplotlib.backends.backend_pdf import PdfPages
+            with PdfPages(tmp_path) as pdf:
+                for fig in figures:
+                    pdf.savefig(fig)
+        else:
+            # One tall PNG with the charts stacked vertically
+            from PIL import Image
+            images = []
+            for fig in figures:
+                buf = io.BytesIO()
+                fig.savefig(buf, format='png', dpi=100)
+                images.append(Image.open(io.BytesIO(buf.getvalue())))
+            sheet = Image.new('RGB', (max(i.width for i in images), sum(i.height for i in images)), 'white')
+            top = 0
+            for image in images:
+                sheet.paste(image, (0, top))
+                top += image.height
+            sheet.save(tmp_path, format='PNG')
+    finally:
+        for fig in figures:
+            charts.close(fig)
+    os.replace(tmp_path, path)
+    return usn
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--out', default='report_cards', help='output directory')
+    parser.add_argument('--format', choices=['pdf', 'png'], default='pdf')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--usn', nargs='*', help='only these students')
+    parser.add_argument('--force', action='store_true', help='re-render existing report cards')
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.out, exist_ok=True)
+    bootstrap(args.db)
+    with connection(args.db) as conn:
+        reports = load_reports(conn, args.usn)
+
+    todo = [r for r in reports
+            if args.force or not os.path.exists(output_path(args.out, r[0], args.format))]
+    skipped = len(reports) - len(todo)
+    print(f"{len(reports)} students, {skipped} already rendered, {len(todo)} to render "
+          f"with {args.workers} workers")
+
+    started = time.perf_counter()
+    failed = []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(render_report, report, args.out, args.format): report[0] for report in todo}
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                future.result()
+            except Exception as e:
+                failed.append((futures[future], e))
+            print(f"\r[{done}/{len(todo)}] {len(failed)} failed", end='', flush=True)
+
+    seconds = time.perf_counter() - started
+    print(f"\nRendered {len(todo) - len(failed)} report cards in {seconds:.1f}s")
+    for usn, error in failed:
+        print(f"  {usn}: {error}", file=sys.stderr)
+    if failed:
+        print("Re-run the same command to retry the failed students.", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
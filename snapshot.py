@@ -0,0 +1,265 @@
+"""Columnar snapshot of the denormalized marks table for analytics
+
+    python snapshot.py --db student_activity.db
+
+marks, semesters, subjects and students are joined into one wide table
+and written as Arrow IPC (Feather v2) files, one per semester number,
+next to the database. Reads memory-map the files and decode only the
+requested columns, so comparison views stop running row-oriented joins
+against the tables data entry writes to.
+
+Triggers keep a change counter per semester number (snapshot_versions);
+refresh() re-exports only the partitions whose counter moved. A
+background thread per process refreshes on a schedule and right after
+writer commits. pyarrow is optional: without it every reader falls back
+to SQLite.
+"""
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+
+import pandas as pd
+
+import queries
+from database import DB_PATH, bootstrap, open_connection
+
+logger = logging.getLogger(__name__)
+
+AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+# Set ANALYTICS_SNAPSHOT=0 to always read SQLite
+ENABLED = AVAILABLE and os.environ.get("ANALYTICS_SNAPSHOT", "1") != "0"
+
+# Set ANALYTICS_SNAPSHOT_STALE=1 to keep reading the last snapshot while a
+# refresh is pending instead of falling back to SQLite
+ALLOW_STALE = os.environ.get("ANALYTICS_SNAPSHOT_STALE", "0") == "1"
+
+# Seconds between scheduled refresh checks (one query on a tiny table)
+REFRESH_INTERVAL = 5
+
+MANIFEST = "manifest.json"
+
+_pa = None
+_schema = None
+
+def _pyarrow():
+    # pyarrow is imported on first snapshot read or export, so pages that
+    # never touch the snapshot don't pay for it on a cold start
+    global _pa
+    if _pa is None:
+        import pyarrow
+        import pyarrow.feather
+        _pa = pyarrow
+    return _pa
+
+def _arrow_schema():
+    # Arrow schema of the snapshot partitions, built with the first import
+    global _schema
+    if _schema is None:
+        pa = _pyarrow()
+        _schema = pa.schema([
+            ('semester_id', pa.int64()),
+            ('usn', pa.string()),
+            ('name', pa.string()),
+            ('branch', pa.dictionary(pa.int32(), pa.string())),
+            ('sem_number', pa.int8()),
+            ('sgpa', pa.float64()),
+            ('mark_id', pa.int64()),
+            ('subject_code', pa.dictionary(pa.int32(), pa.string())),
+            ('subject_name', pa.dictionary(pa.int32(), pa.string())),
+            ('credits', pa.int8()),
+            ('cie', pa.float64()),
+            ('see', pa.float64()),
+            ('total', pa.float64()),
+            ('grade', pa.dictionary(pa.int32(), pa.string())),
+        ])
+    return _schema
+
+def snapshot_dir(db_path=DB_PATH):
+    return f"{os.path.splitext(db_path)[0]}_snapshot"
+
+def export_partition(conn, sem_number):
+    """Read one semester number's denormalized rows as an Arrow table"""
+    df = pd.read_sql_query("""
+        SELECT sem.semester_id, sem.usn, st.name, st.branch, sem.sem_number, sem.sgpa,
+               m.mark_id, m.subject_code, sub.name as subject_name, sub.credits,
+               m.cie, m.see, m.total, m.grade
+        FROM semesters sem
+        JOIN students st ON st.usn = sem.usn
+        LEFT JOIN marks m ON m.semester_id = sem.semester_id
+        LEFT JOIN subjects sub ON sub.code = m.subject_code
+        WHERE sem.sem_number = ?
+        ORDER BY sem.usn, m.subject_code
+    """, conn, params=(int(sem_number),))
+    return _pyarrow().Table.from_pandas(df, preserve_index=False).cast(_arrow_schema())
+
+def _write_json(path, value):
+    with open(path, 'w') as f:
+        json.dump(value, f)
+
+class Snapshot:
+    """The on-disk snapshot for one database file"""
+
+    def __init__(self, db_path=DB_PATH, path=None):
+        self.db_path = db_path
+        self.path = path or snapshot_dir(db_path)
+        self.refreshes = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.manifest = self._read_manifest()
+
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.path, MANIFEST)) as f:
+                return {int(k): v for k, v in json.load(f).items()}
+        except (OSError, ValueError):
+            return {}
+
+    def _partition_path(self, sem_number):
+        return os.path.join(self.path, f"sem_{int(sem_number)}.arrow")
+
+    def _replace(self, path, write):
+        # write(tmp_path) then move it over path. The temp name is unique,
+        # since other processes may refresh the same directory concurrently
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        os.close(fd)
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def versions(self, conn):
+        return dict(conn.execute("SELECT sem_number, version FROM snapshot_versions").fetchall())
+
+    def is_fresh(self, conn):
+        """True when every partition matches the database's change counters"""
+        return self.manifest == self.versions(conn)
+
+    def refresh(self, conn):
+        """Re-export partitions whose change counter moved; returns their sem numbers"""
+        with self._lock:
+            # One read transaction, so the counters match the rows exported
+            conn.execute("BEGIN")
+            try:
+                versions = self.versions(conn)
+                changed = [sem for sem, version in versions.items() if self.manifest.get(sem) != version]
+                tables = {sem: export_partition(conn, sem) for sem in changed}
+            finally:
+                conn.rollback()
+            if versions == self.manifest:
+                return []
+
+            os.makedirs(self.path, exist_ok=True)
+            for sem, table in tables.items():
+                # Uncompressed, so readers can map the buffers straight from disk
+                self._replace(self._partition_path(sem),
+                              lambda tmp_path: _pyarrow().feather.write_feather(table, tmp_path, compression='uncompressed'))
+            self._replace(os.path.join(self.path, MANIFEST), lambda tmp_path: _write_json(tmp_path, versions))
+            removed, self.manifest = set(self.manifest) - set(versions), versions
+            # Dropped partitions go only after readers stop listing them
+            for sem in removed:
+                try:
+                    os.remove(self._partition_path(sem))
+                except FileNotFoundError:
+                    pass  # another process's refresh got there first
+            self.refreshes += 1
+            return changed
+
+    def scan(self, columns):
+        """Memory-mapped read of the given columns across all partitions"""
+        pa = _pyarrow()
+        tables = [pa.feather.read_table(self._partition_path(sem), columns=columns, memory_map=True)
+                  for sem in sorted(self.manifest)]
+        if not tables:
+            return _arrow_schema().empty_table().select(columns).to_pandas()
+        return pa.concat_tables(tables).to_pandas()
+
+    def notify(self):
+        """Ask the background thread to refresh now (e.g. after a commit)"""
+        self._wake.set()
+
+    def start(self):
+        """Start the background refresh thread once"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"snapshot:{self.db_path}", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        try:
+            conn = open_connection(self.db_path, readonly=True)
+        except Exception:
+            # Readers keep falling back to SQLite
+            logger.exception("snapshot refresher for %s could not start", self.db_path)
+            return
+        while True:
+            self._wake.wait(REFRESH_INTERVAL)
+            self._wake.clear()
+            try:
+                self.refresh(conn)
+            except Exception:
+                logger.exception("snapshot refresh for %s failed", self.db_path)
+
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+def get_snapshot(db_path=DB_PATH):
+    """Return the process-wide snapshot for a database file with its refresher running"""
+    with _snapshots_lock:
+        snap = _snapshots.get(db_path)
+        if snap is None:
+            snap = _snapshots[db_path] = Snapshot(db_path)
+            snap.start()
+        return snap
+
+def current(conn, db_path=DB_PATH, allow_stale=ALLOW_STALE):
+    """Return the snapshot if it can serve reads right now, else None (read SQLite)"""
+    if not ENABLED:
+        return None
+    snap = get_snapshot(db_path)
+    if snap.manifest and (allow_stale or snap.is_fresh(conn)):
+        return snap
+    snap.notify()
+    return None
+
+def load_comparison_data(conn, snap, versions):
+    """queries.load_comparison_data computed from the snapshot's columns
+
+    versions is the manifest the caller saw, as a cache key: a stale
+    snapshot must not be cached under the current write generation.
+    """
+    rows = snap.scan(['semester_id', 'usn', 'name', 'sem_number', 'sgpa', 'credits'])
+    # Semester credits are the sum over its marks, as stored in semesters.credits
+    credits = rows.groupby('semester_id')['credits'].sum().astype('int64')
+    series = (rows.drop_duplicates('semester_id')
+              .sort_values(['usn', 'sem_number'])[['semester_id', 'usn', 'name', 'sem_number', 'sgpa']]
+              .reset_index(drop=True))
+    series['credits'] = series.pop('semester_id').map(credits)
+    series['sem_number'] = series['sem_number'].astype('int64')
+    return queries.comparison_series(series)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or refresh the columnar analytics snapshot")
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--out', help='snapshot directory (default: next to the database)')
+    args = parser.parse_args(argv)
+
+    if not AVAILABLE:
+        print("pyarrow is not installed; pip install pyarrow", file=sys.stderr)
+        return 1
+    bootstrap(args.db)
+    conn = open_connection(args.db, readonly=True)
+    changed = Snapshot(args.db, args.out).refresh(conn)
+    print(f"Refreshed {len(changed)} partition(s): {sorted(changed)}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
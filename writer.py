@@ -0,0 +1,255 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+import aggregates
+import cache
+import grading
+import ranks
+from database import DB_PATH, open_connection
+
+logger = logging.getLogger(__name__)
+
+# Single writer per process and database file. Sessions submit write
+# functions to a queue; one background thread runs them on its own
+# connection, grouping requests that arrive close together into a single
+# transaction so concurrent saves share one commit instead of fighting
+# over the write lock. Each request runs under a savepoint, so a failing
+# request is rolled back on its own and its error goes to its caller only.
+
+# After the first request of a batch, wait this long for more to arrive
+BATCH_WINDOW = 0.005
+
+MAX_BATCH = 64
+
+# Seconds write() waits for an answer; long jobs such as imports pass more
+WRITE_TIMEOUT = 120
+
+_batch = threading.local()
+
+_STOP = object()
+
+def defer(conn, func, item):
+    """Queue func(conn, items) to run once at the end of the current batch
+
+    Lets per-request maintenance (aggregate and rank refreshes) run as one
+    set-based call for the whole batch. Outside a batch it runs right away.
+    """
+    pending = getattr(_batch, 'pending', None)
+    if pending is None:
+        func(conn, [item])
+    else:
+        pending.setdefault(func, []).append(item)
+
+class Writer:
+    """Background thread that owns the process's write connection"""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self.batches = 0
+        self.requests = 0
+        self._queue = queue.Queue()
+        self._held = None
+        self._listeners = set()
+        self._error = None
+        self._state_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=f"writer:{path}", daemon=True)
+        self._thread.start()
+
+    def submit(self, func, *args, exclusive=False, **kwargs):
+        """Queue func(conn, *args, **kwargs) and return a Future for its result
+
+        Batched functions must not commit. exclusive=True runs func alone,
+        managing its own transactions (e.g. a chunked bulk import).
+        """
+        future = Future()
+        with self._state_lock:
+            if self._error is not None:
+                future.set_exception(self._error)
+            else:
+                self._queue.put((func, args, kwargs, exclusive, future))
+        return future
+
+    def write(self, func, *args, exclusive=False, timeout=WRITE_TIMEOUT, **kwargs):
+        """Run func on the writer and wait for its result or error"""
+        future = self.submit(func, *args, exclusive=exclusive, **kwargs)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            raise TimeoutError(f"No answer from the database writer within {timeout}s; "
+                               "the write may still complete") from None
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def add_listener(self, callback):
+        """Call callback() on the writer thread after each commit; adding it again is a no-op"""
+        self._listeners.add(callback)
+
+    def _notify(self):
+        # A failing listener must not take the writer thread down with it
+        for callback in list(self._listeners):
+            try:
+                callback()
+            except Exception:
+                logger.exception("writer listener %r failed", callback)
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def stats(self):
+        return {'batches': self.batches, 'requests': self.requests}
+
+    def _next(self, timeout=None):
+        if self._held is not None:
+            request, self._held = self._held, None
+            return request
+        if timeout is not None and timeout <= 0:
+            return self._queue.get_nowait()
+        return self._queue.get(timeout=timeout)
+
+    def _run(self):
+        try:
+            conn = open_connection(self.path)
+        except Exception as e:
+            self._fail(e)
+            return
+        try:
+            while True:
+                request = self._next()
+                if request is _STOP:
+                    break
+                if request[3]:
+                    self._run_exclusive(conn, request)
+                    continue
+
+                batch = [request]
+                deadline = time.monotonic() + BATCH_WINDOW
+                while len(batch) < MAX_BATCH:
+                    try:
+                        request = self._next(deadline - time.monotonic())
+                    except queue.Empty:
+                        break
+                    if request is _STOP or request[3]:
+                        # Shutdown and exclusive requests wait for this batch
+                        self._held = request
+                        break
+                    batch.append(request)
+                self._run_batch(conn, batch)
+        except Exception as e:
+            self._fail(e)
+        finally:
+            conn.close()
+
+    def _fail(self, error):
+        # The thread is about to exit: answer every waiting and future
+        # request with the error instead of leaving callers blocked
+        logger.error("writer for %s stopped", self.path, exc_info=error)
+        with self._state_lock:
+            self._error = error
+        requests = [self._held]
+        while True:
+            try:
+                requests.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        for request in requests:
+            if request is not None and request is not _STOP:
+                request[-1].set_exception(error)
+
+    def _run_exclusive(self, conn, request):
+        func, args, kwargs, _, future = request
+        try:
+            result = func(conn, *args, **kwargs)
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+        self.batches += 1
+        self.requests += 1
+        # Exclusive requests may have committed part of their work even on error
+        self._notify()
+
+    def _run_batch(self, conn, batch):
+        pending = _batch.pending = {}
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for func, args, kwargs, _, future in batch:
+                sizes = {f: len(items) for f, items in pending.items()}
+                conn.execute("SAVEPOINT request")
+                try:
+                    result = func(conn, *args, **kwargs)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO request")
+                    conn.execute("RELEASE request")
+                    for f, items in pending.items():
+                        del items[sizes.get(f, 0):]
+                    outcomes.append((future, None, e))
+                else:
+                    conn.execute("RELEASE request")
+                    outcomes.append((future, result, None))
+
+            _batch.pending = None
+            for func, items in pending.items():
+                if items:
+                    func(conn, items)
+            if any(error is None for _, _, error in outcomes):
+                cache.bump_generation(conn)
+            conn.commit()
+        except Exception as e:
+            # The shared transaction failed (e.g. at commit); nothing was written
+            if conn.in_transaction:
+                conn.rollback()
+            outcomes = [(request[-1], None, e) for request in batch]
+        finally:
+            _batch.pending = None
+
+        self.batches += 1
+        self.requests += len(batch)
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+        if any(error is None for _, _, error in outcomes):
+            self._notify()
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+def get_writer(path=DB_PATH):
+    """Return the process-wide writer for a database file, starting it on first use"""
+    with _writers_lock:
+        writer = _writers.get(path)
+        if writer is None or not writer.is_alive():
+            writer = _writers[path] = Writer(path)
+        return writer
+
+# Write operations submitted by the dashboard. They run inside a writer
+# batch and must not commit.
+
+def add_student(conn, usn, name, branch, sem):
+    """Insert a new student"""
+    conn.execute("INSERT INTO students (usn, name, branch, sem) VALUES (?, ?, ?, ?)",
+                 (usn, name, branch, sem))
+
+def save_semester(conn, usn, sem_number, marks_data):
+    """Insert a semester with its (subject_code, cie, see, total, grade) rows; returns the SGPA"""
+    semester_id = conn.execute("INSERT INTO semesters (usn, sem_number, sgpa) VALUES (?, ?, ?)",
+                               (usn, sem_number, 0)).lastrowid
+    conn.executemany("INSERT INTO marks (semester_id, subject_code, cie, see, total, grade) VALUES (?, ?, ?, ?, ?, ?)",
+                     [(semester_id,) + tuple(row) for row in marks_data])
+
+    gpa = grading.semester_gpa(conn, [semester_id]).iloc[0]
+    sgpa = float(gpa['sgpa'])
+    conn.execute("UPDATE semesters SET sgpa = ?, credits = ? WHERE semester_id = ?",
+                 (sgpa, int(gpa['credits']), semester_id))
+    defer(conn, aggregates.add_semesters, semester_id)
+    defer(conn, ranks.add_semesters, semester_id)
+    return sgpa